@@ -1,8 +1,15 @@
+import asyncio
+import datetime
+import time
 import discord
 from discord.ext import commands
 from utils.sticky_manager import StickyManager
 from utils.theme_manager import ThemeManager
 from utils.language_manager import LanguageManager
+from utils.sticky_scheduler import StickyScheduler
+from utils.sticky_renderer import StickyRenderer
+from utils.config import Config
+from utils.error_tracker import ErrorTracker
 import logging
 
 logger = logging.getLogger("motionbot")
@@ -10,71 +17,236 @@ logger = logging.getLogger("motionbot")
 class Events(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.scheduler = StickyScheduler(self.repost_sticky, Config.STICKY_QUIET_WINDOW, Config.STICKY_MAX_DELAY)
+        self._reconcile_task = None
+        self._refresh_task = None
+        self.last_reconcile = None
 
     @commands.Cog.listener()
     async def on_ready(self):
         logger.info(f"Events Cog Loaded. Bot is ready: {self.bot.user}")
+        self.start_reconcile("ready")
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        self.start_reconcile("resume")
 
     @commands.Cog.listener()
     async def on_message(self, message):
         if message.author.bot or not message.guild:
             return
 
-        # Sticky Message Logic
-        sticky_config = StickyManager.get_sticky(message.guild.id, message.channel.id)
-        if sticky_config:
-            if StickyManager.is_locked(message.channel.id):
+        # Sticky Message Logic: reposts are coalesced by the scheduler
+        if StickyManager.has_sticky(message.channel.id):
+            self.scheduler.mark(message.channel)
+
+    async def repost_sticky(self, channel):
+        sticky_config = StickyManager.get_sticky(channel.guild.id, channel.id)
+        if not sticky_config:
+            return
+
+        # Delete old message (no need to fetch it first)
+        last_id = sticky_config.get('lastMessageId')
+        if last_id:
+            try:
+                await channel.get_partial_message(int(last_id)).delete()
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                pass
+
+        await self.send_sticky(channel, sticky_config)
+
+    async def send_sticky(self, channel, sticky_config):
+        embed = StickyRenderer.render(channel.id, sticky_config['content'])
+        new_msg = await channel.send(embed=embed)
+
+        StickyManager.update_last_message_id(channel.guild.id, channel.id, new_msg.id)
+
+    # Sticky Reconciliation: after a restart or a gateway outage the stored sticky
+    # may no longer be the latest message. Check every sticky channel with bounded
+    # concurrency (discord.py waits out any 429s per route) and repost where needed.
+    def start_reconcile(self, reason):
+        if self._reconcile_task and not self._reconcile_task.done():
+            return
+        self._reconcile_task = asyncio.create_task(self.reconcile_stickies(reason))
+
+    async def reconcile_stickies(self, reason):
+        targets = StickyManager.list_stickies()
+        if not targets:
+            return
+
+        total = len(targets)
+        report = {"reason": reason, "total": total, "checked": 0, "ok": 0, "reposted": 0, "orphans_deleted": 0, "skipped": 0, "failed": 0}
+        progress_step = max(1, total // 10)
+        semaphore = asyncio.Semaphore(Config.STICKY_RECONCILE_CONCURRENCY)
+        started = time.perf_counter()
+        logger.info(f"Sticky reconciliation ({reason}) started for {total} channels")
+
+        async def worker(channel_id, sticky_config):
+            async with semaphore:
+                try:
+                    status, orphans = await self.reconcile_channel(int(channel_id), sticky_config)
+                    report[status] += 1
+                    report["orphans_deleted"] += orphans
+                except Exception as e:
+                    report["failed"] += 1
+                    logger.warning(f"Sticky reconciliation failed for channel {channel_id}: {e}")
+
+                report["checked"] += 1
+                if report["checked"] % progress_step == 0 and report["checked"] < total:
+                    logger.info(f"Sticky reconciliation ({reason}): {report['checked']}/{total} channels checked")
+
+        await asyncio.gather(*(worker(c_id, config) for _, c_id, config in targets))
+
+        report["elapsed"] = round(time.perf_counter() - started, 3)
+        self.last_reconcile = report
+        logger.info(
+            f"Sticky reconciliation ({reason}) finished in {report['elapsed']}s: "
+            f"{report['ok']} up to date, {report['reposted']} reposted, {report['orphans_deleted']} orphans deleted, "
+            f"{report['skipped']} skipped, {report['failed']} failed"
+        )
+
+    async def reconcile_channel(self, channel_id, sticky_config):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None or self.scheduler.is_scheduled(channel_id):
+            # Channel is gone/not visible, or a coalesced repost is already on its way
+            return "skipped", 0
+
+        last_id = sticky_config.get('lastMessageId')
+        last_id = int(last_id) if last_id else None
+        history = [m async for m in channel.history(limit=Config.STICKY_RECONCILE_HISTORY)]
+
+        # Every copy of this sticky the bot posted within the window
+        stickies = [
+            m for m in history
+            if m.author.id == self.bot.user.id and m.embeds and m.embeds[0].description == sticky_config['content']
+        ]
+
+        if history and history[0] in stickies:
+            # Already at the bottom: adopt it if the stored ID is stale, drop the rest
+            latest = history[0]
+            if latest.id != last_id:
+                StickyManager.update_last_message_id(channel.guild.id, channel.id, latest.id)
+            orphans = [m for m in stickies if m.id != latest.id]
+            await self.delete_messages(channel, orphans)
+            return "ok", len(orphans)
+
+        orphans = list(stickies)
+        if last_id and all(m.id != last_id for m in stickies):
+            orphans.append(channel.get_partial_message(last_id))
+        await self.delete_messages(channel, orphans)
+        await self.send_sticky(channel, sticky_config)
+        return "reposted", len(stickies)
+
+    # Theme Refresh: re-render every live sticky in place when the theme changes
+    def on_theme_changed(self, theme):
+        StickyRenderer.invalidate()
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = self.bot.loop.create_task(self.refresh_stickies())
+
+    async def refresh_stickies(self):
+        targets = [
+            (int(c_id), config) for _, c_id, config in StickyManager.list_stickies()
+            if config.get('lastMessageId')
+        ]
+        if not targets:
+            return
+
+        semaphore = asyncio.Semaphore(Config.STICKY_REFRESH_CONCURRENCY)
+        started = time.perf_counter()
+        results = {"updated": 0, "failed": 0}
+
+        async def worker(channel_id, sticky_config):
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
                 return
-            
-            StickyManager.lock(message.channel.id)
+            async with semaphore:
+                try:
+                    embed = StickyRenderer.render(channel_id, sticky_config['content'])
+                    await channel.get_partial_message(int(sticky_config['lastMessageId'])).edit(embed=embed)
+                    results["updated"] += 1
+                except discord.HTTPException:
+                    # Gone or not editable: the next repost renders it with the new theme
+                    results["failed"] += 1
+
+        await asyncio.gather(*(worker(c_id, config) for c_id, config in targets))
+        logger.info(
+            f"Sticky theme refresh finished in {time.perf_counter() - started:.3f}s: "
+            f"{results['updated']} updated, {results['failed']} failed"
+        )
+
+    async def delete_messages(self, channel, messages):
+        if not messages:
+            return
+
+        # Bulk delete needs Manage Messages and only takes messages under 14 days old
+        bulk = []
+        single = []
+        cutoff = discord.utils.utcnow() - datetime.timedelta(days=14)
+        can_bulk = channel.permissions_for(channel.guild.me).manage_messages
+        for m in messages:
+            if can_bulk and m.created_at > cutoff:
+                bulk.append(m)
+            else:
+                single.append(m)
+
+        if len(bulk) > 1:
             try:
-                # Delete old message
-                last_id = sticky_config.get('lastMessageId')
-                if last_id:
-                    try:
-                        old_msg = await message.channel.fetch_message(last_id)
-                        await old_msg.delete()
-                    except discord.NotFound:
-                        pass
-                    except discord.HTTPException:
-                        pass
-
-                # Send new sticky
-                theme = ThemeManager.get_theme()
-                color = int(theme['primary'].replace('#', ''), 16)
-                
-                embed = discord.Embed(description=sticky_config['content'], color=color)
-                new_msg = await message.channel.send(embed=embed)
-                
-                StickyManager.update_last_message_id(message.guild.id, message.channel.id, new_msg.id)
-            
-            except Exception as e:
-                logger.error(f"Error in sticky message logic: {e}")
-            finally:
-                StickyManager.unlock(message.channel.id)
+                for i in range(0, len(bulk), 100):
+                    await channel.delete_messages(bulk[i:i + 100])
+            except discord.HTTPException:
+                single.extend(bulk)
+        else:
+            single.extend(bulk)
+
+        for m in single:
+            try:
+                await m.delete()
+            except discord.HTTPException:
+                pass
 
     # Global Error Handler for App Commands
     def cog_load(self):
         tree = self.bot.tree
         self._old_tree_error = tree.on_error
         tree.on_error = self.on_app_command_error
+        ThemeManager.subscribe(self.on_theme_changed)
 
     def cog_unload(self):
         self.bot.tree.on_error = self._old_tree_error
+        ThemeManager.unsubscribe(self.on_theme_changed)
+        self.scheduler.cancel_all()
 
     async def on_app_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
         from utils.logger import log_error
         
-        # Log error in legacy style
         command_name = interaction.command.name if interaction.command else "unknown"
-        log_path = log_error(error, command_name)
-        
-        logger.error(f"Command error in {command_name}: {error}")
+        entry, write_trace = ErrorTracker.record(error, command_name, {
+            "guildId": interaction.guild_id,
+            "channelId": interaction.channel_id,
+            "userId": interaction.user.id if interaction.user else None,
+            "options": (interaction.data or {}).get('options'),
+        })
+
+        # Full trace once per fingerprint per window; repeats are only counted
+        if write_trace:
+            log_path = log_error(error, command_name, entry["fingerprint"], entry["sinceTrace"])
+            if log_path:
+                ErrorTracker.trace_written(entry, log_path)
+            else:
+                ErrorTracker.trace_dropped(entry)
+                log_path = entry["logPath"]
+            logger.error(f"Command error in {command_name} [{entry['fingerprint']}]: {error}")
+        else:
+            log_path = entry["logPath"]
         
         # Notify User
         try:
-            msg = LanguageManager.t('error_prefix') if 'error_prefix' in LanguageManager._cache.get(LanguageManager._current_lang, {}) else "There was an error while executing this command!"
-            msg = f"{msg}\nLogs have been saved to `{log_path}`"
+            msg = LanguageManager.t('error_prefix', interaction) if LanguageManager.has('error_prefix', interaction) else "There was an error while executing this command!"
+            if log_path:
+                msg = f"{msg}\nLogs have been saved to `{log_path}`"
             
             if interaction.response.is_done():
                 await interaction.followup.send(msg, ephemeral=True)
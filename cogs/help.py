@@ -7,33 +7,34 @@ from utils.theme_manager import ThemeManager
 class Help(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Command categories plus rendered category pages, dropped on theme changes
+        self._catalog = None
+
+    async def cog_load(self):
+        ThemeManager.subscribe(self.invalidate_catalog)
+
+    async def cog_unload(self):
+        ThemeManager.unsubscribe(self.invalidate_catalog)
+
+    def invalidate_catalog(self, theme=None):
+        self._catalog = None
+
+    def get_catalog(self):
+        if self._catalog is None:
+            # Iterate Cogs and their app_commands
+            categories = {}
+            for name, cog in self.bot.cogs.items():
+                cmds = cog.get_app_commands()
+                if cmds:
+                    categories[name] = cmds
+            self._catalog = {"categories": categories, "pages": {}}
+        return self._catalog
 
     @app_commands.command(name="help", description="Displays information about the bot and commands.")
     async def help_command(self, interaction: discord.Interaction):
-        theme = ThemeManager.get_theme()
-        
-        # Calculate categories
-        categories = {}
-        # Iterate over app commands (Slash)
-        # Note: bot.tree.get_commands() returns top level commands.
-        for cmd in self.bot.tree.get_commands():
-            # If command in a GroupCog or just grouped, we might need to drill down?
-            # Cog association is not always directly on the generic AppCommand object in tree list
-            # But normally we can infer it or we group manually.
-            # actually discord.app_commands.Command has `binding` which might be the cog?
-            # A simpler way: Iterate Cogs.
-             pass
-        
-        # Better approach: Iterate Cogs and their app_commands
-        for name, cog in self.bot.cogs.items():
-            # Get commands from the cog
-            # Note: cog.get_app_commands() returns commands registered in that cog
-            cmds = cog.get_app_commands()
-            if cmds:
-                 categories[name] = cmds
-        
-        # Also catch commands not in cogs (if any)
-        # ... logic skipped for simplicity as all mine are in cogs
+        theme = ThemeManager.get()
+        catalog = self.get_catalog()
+        categories = catalog["categories"]
 
         uptime_seconds = time.time() - self.bot.start_time if hasattr(self.bot, 'start_time') else 0
         days, rem = divmod(uptime_seconds, 86400)
@@ -44,7 +45,7 @@ class Help(commands.Cog):
         home_embed = discord.Embed(
             title=f"{self.bot.user.name} Help Interface",
             description="**A powerful Discord utility bot.**", # Hardcoded description from package.json equivalent
-            color=int(theme['primary'].replace('#', ''), 16)
+            color=theme.primary
         )
         if self.bot.user.avatar:
             home_embed.set_thumbnail(url=self.bot.user.avatar.url)
@@ -61,18 +62,18 @@ class Help(commands.Cog):
         
         home_embed.set_footer(text="Select a category below to navigate", icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None)
 
-        view = HelpView(self.bot, categories, home_embed, theme)
+        view = HelpView(self.bot, catalog, home_embed)
         await interaction.response.send_message(embed=home_embed, view=view, ephemeral=True)
 
 class HelpView(discord.ui.View):
-    def __init__(self, bot, categories, home_embed, theme):
+    def __init__(self, bot, catalog, home_embed):
         super().__init__(timeout=300)
         self.bot = bot
-        self.categories = categories
+        self.catalog = catalog
+        self.categories = catalog["categories"]
         self.home_embed = home_embed
-        self.theme = theme
         
-        self.add_item(HelpSelect(categories))
+        self.add_item(HelpSelect(self.categories))
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         # Allow anyone or restrict? Legacy used `ephemeral` so only user sees it anyway.
@@ -126,40 +127,48 @@ class HelpSelect(discord.ui.Select):
              await interaction.response.edit_message(embed=view.home_embed)
         
         elif val == "creator":
-            embed = discord.Embed(title="<:code:1467345977475334307> Creator Information", color=int(view.theme.get('accent', view.theme['primary']).replace('#', ''), 16))
-            embed.description = "This bot is maintained and developed by **Adriel**."
-            embed.add_field(name="GitHub", value="[AdrielGGmotion](https://github.com/adrielGGmotion)", inline=True)
-            embed.add_field(name="Project Repository", value="[motionbot](https://github.com/adrielGGmotion/motionbot)", inline=True)
-            embed.add_field(name="Language", value="Python (discord.py)", inline=True)
-            embed.set_thumbnail(url="https://github.com/adrielGGmotion.png")
+            embed = view.catalog["pages"].get(val)
+            if embed is None:
+                embed = discord.Embed(title="<:code:1467345977475334307> Creator Information", color=ThemeManager.get().accent)
+                embed.description = "This bot is maintained and developed by **Adriel**."
+                embed.add_field(name="GitHub", value="[AdrielGGmotion](https://github.com/adrielGGmotion)", inline=True)
+                embed.add_field(name="Project Repository", value="[motionbot](https://github.com/adrielGGmotion/motionbot)", inline=True)
+                embed.add_field(name="Language", value="Python (discord.py)", inline=True)
+                embed.set_thumbnail(url="https://github.com/adrielGGmotion.png")
+                view.catalog["pages"][val] = embed
             await interaction.response.edit_message(embed=embed)
             
         elif val.startswith("cat_"):
-            cat_name = val.replace("cat_", "")
-            cmds = view.categories.get(cat_name, [])
-            
-            embed = discord.Embed(
-                title=f"<:files:1467345973318520955> {cat_name} Commands",
-                color=int(view.theme['primary'].replace('#', ''), 16)
-            )
-            if view.bot.user.avatar:
-                embed.set_thumbnail(url=view.bot.user.avatar.url)
-                
-            if cmds:
-                desc = ""
-                for cmd in cmds:
-                    # cmd is AppCommand or Group
-                    if isinstance(cmd, app_commands.Group):
-                         # If group, maybe list subcommands?
-                         # For now just list group name
-                         desc += f"**/ {cmd.name}**\n{cmd.description}\n\n"
-                    else:
-                         desc += f"**/ {cmd.name}**\n{cmd.description}\n\n"
-                embed.description = desc
-            else:
-                embed.description = "No commands found."
-                
+            embed = view.catalog["pages"].get(val)
+            if embed is None:
+                embed = self.build_category_embed(view, val.replace("cat_", ""))
+                view.catalog["pages"][val] = embed
             await interaction.response.edit_message(embed=embed)
 
+    def build_category_embed(self, view, cat_name):
+        cmds = view.categories.get(cat_name, [])
+        
+        embed = discord.Embed(
+            title=f"<:files:1467345973318520955> {cat_name} Commands",
+            color=ThemeManager.get().primary
+        )
+        if view.bot.user.avatar:
+            embed.set_thumbnail(url=view.bot.user.avatar.url)
+            
+        if cmds:
+            desc = ""
+            for cmd in cmds:
+                # cmd is AppCommand or Group
+                if isinstance(cmd, app_commands.Group):
+                     # If group, maybe list subcommands?
+                     # For now just list group name
+                     desc += f"**/ {cmd.name}**\n{cmd.description}\n\n"
+                else:
+                     desc += f"**/ {cmd.name}**\n{cmd.description}\n\n"
+            embed.description = desc
+        else:
+            embed.description = "No commands found."
+        return embed
+
 async def setup(bot):
     await bot.add_cog(Help(bot))
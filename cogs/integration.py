@@ -1,157 +1,194 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.config import Config
 from utils.theme_manager import ThemeManager
-import aiohttp
-import urllib.parse
+from utils.gsm_client import GSMError
 
 class Integration(commands.GroupCog, name="gsm"):
-    def __init__(self, bot):
+    def __init__(self, bot, gsm_client):
         self.bot = bot
-        self.base_url = Config.GSM_BASE_URL
+        self.gsm = gsm_client
+
+    async def cog_load(self):
+        # One registration serves the components of every spec panel ever sent
+        self.bot.add_dynamic_items(OverviewButton, CategorySelect)
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(OverviewButton, CategorySelect)
+
+    @staticmethod
+    async def respond(interaction: discord.Interaction, *args, **kwargs):
+        # Cache hits answer directly; everything else was deferred first
+        if interaction.response.is_done():
+            await interaction.followup.send(*args, **kwargs)
+        else:
+            await interaction.response.send_message(*args, **kwargs)
+
+    @staticmethod
+    def build_search_embed(query, devices):
+        embed = discord.Embed(
+            title=f"Search Results for \"{query}\"",
+            color=ThemeManager.get().primary
+        )
+        embed.set_footer(text="GSMArena Integration", icon_url="https://www.gsmarena.com/assets/img/logo-3.png")
+
+        description = ""
+        for i, device in enumerate(devices[:5]):
+            name = device.get('name') or device.get('title') or 'Unknown'
+            did = device.get('id') or device.get('slug') or 'unknown'
+            description += f"**{i+1}.** {name} (`{did}`)\n"
+        
+        if len(devices) > 5:
+            description += f"\n*...and {len(devices)-5} more.*"
+        
+        description += "\nUse `/gsm specs <device_id>` to see details."
+        embed.description = description
+        
+        if devices[0].get('img') or devices[0].get('image'):
+            embed.set_thumbnail(url=devices[0].get('img') or devices[0].get('image'))
+        return embed
 
     @app_commands.command(name="search", description="Search for a device")
     @app_commands.describe(query="Device name to search for")
     async def search(self, interaction: discord.Interaction, query: str):
-        if not self.base_url:
+        if not self.gsm.base_url:
             await interaction.response.send_message("GSMArena API URL is not configured.", ephemeral=True)
             return
 
-        await interaction.response.defer()
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/search?q={urllib.parse.quote(query)}"
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        await interaction.followup.send(f"API Error: {resp.status}")
-                        return
-                    
-                    data = await resp.json()
-                    devices = data if isinstance(data, list) else data.get('data', [])
-
-                    if not devices:
-                        await interaction.followup.send(f"No devices found for **{query}**")
-                        return
-
-                    theme = ThemeManager.get_theme()
-                    embed = discord.Embed(
-                        title=f"Search Results for \"{query}\"",
-                        color=int(theme['primary'].replace('#', ''), 16)
-                    )
-                    embed.set_footer(text="GSMArena Integration", icon_url="https://www.gsmarena.com/assets/img/logo-3.png")
-
-                    description = ""
-                    for i, device in enumerate(devices[:5]):
-                        name = device.get('name') or device.get('title') or 'Unknown'
-                        did = device.get('id') or device.get('slug') or 'unknown'
-                        description += f"**{i+1}.** {name} (`{did}`)\n"
-                    
-                    if len(devices) > 5:
-                        description += f"\n*...and {len(devices)-5} more.*"
-                    
-                    description += "\nUse `/gsm specs <device_id>` to see details."
-                    embed.description = description
-                    
-                    if devices[0].get('img') or devices[0].get('image'):
-                        embed.set_thumbnail(url=devices[0].get('img') or devices[0].get('image'))
-
-                    await interaction.followup.send(embed=embed)
-        except Exception as e:
-            await interaction.followup.send("Failed to fetch data.")
-            print(f"GSM Search Error: {e}")
+        devices = self.gsm.cached_search(query)
+        if devices is None:
+            await interaction.response.defer()
+            try:
+                devices = await self.gsm.search(query, self.gsm.deadline_for(interaction), check_cache=False)
+            except GSMError as e:
+                await interaction.followup.send(str(e))
+                return
+            except Exception as e:
+                await interaction.followup.send("Failed to fetch data.")
+                print(f"GSM Search Error: {e}")
+                return
+
+        if not devices:
+            await self.respond(interaction, f"No devices found for **{query}**")
+            return
+
+        await self.respond(interaction, embed=self.build_search_embed(query, devices))
+        self.gsm.prefetch(devices, interaction.guild_id)
 
     @app_commands.command(name="specs", description="Get specifications for a device")
     @app_commands.describe(device_id="The ID of the device")
     async def specs(self, interaction: discord.Interaction, device_id: str):
-        if not self.base_url:
+        if not self.gsm.base_url:
              await interaction.response.send_message("GSMArena API URL is not configured.", ephemeral=True)
              return
 
+        device = self.gsm.cached_device(device_id)
+        if device is None:
+            await interaction.response.defer()
+            try:
+                device = await self.gsm.device(device_id, self.gsm.deadline_for(interaction), check_cache=False)
+            except GSMError as e:
+                await interaction.followup.send(str(e))
+                return
+            except Exception as e:
+                await interaction.followup.send("Failed to fetch details.")
+                print(f"GSM Specs Error: {e}")
+                return
+
+        device_id = self.gsm.normalize_id(device_id)
+        if len(device_id) > MAX_DEVICE_ID_LENGTH:
+            await self.respond(interaction, embed=device.home_embed())
+            return
+        await self.respond(interaction, embed=device.home_embed(), view=SpecsView(device_id, device))
+
+    # Autocomplete is served from the local device index only, never upstream
+    @search.autocomplete('query')
+    async def query_autocomplete(self, interaction: discord.Interaction, current: str):
+        names = []
+        for _, name in self.gsm.index.search(current):
+            if name not in names:
+                names.append(name)
+        return [app_commands.Choice(name=name[:100], value=name[:100]) for name in names]
+
+    @specs.autocomplete('device_id')
+    async def device_id_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=f"{name} ({device_id})"[:100], value=device_id)
+            for device_id, name in self.gsm.index.search(current)
+            # A cut id is not a device id, and longer ones cannot open a spec panel
+            if len(device_id) <= MAX_DEVICE_ID_LENGTH
+        ]
+
+# custom_ids are limited to 100 characters, prefix included
+MAX_DEVICE_ID_LENGTH = 90
+
+async def load_device(interaction: discord.Interaction, device_id):
+    # Spec panels keep no state: the device comes from the GSM caches (or the
+    # API) on every interaction. Returns None once the user has been told why not.
+    gsm = interaction.client.gsm_client
+    device = gsm.cached_device(device_id)
+    if device is None:
         await interaction.response.defer()
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/device/{device_id}"
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        await interaction.followup.send(f"API Error: {resp.status}")
-                        return
-                    
-                    device = await resp.json()
-                    if device.get('error'):
-                         await interaction.followup.send(f"Device not found: {device.get('error')}")
-                         return
-
-                    view = SpecsView(device)
-                    await interaction.followup.send(embed=view.build_home_embed(), view=view)
+            device = await gsm.device(device_id, gsm.deadline_for(interaction), check_cache=False)
         except Exception as e:
-            await interaction.followup.send("Failed to fetch details.")
-            print(f"GSM Specs Error: {e}")
+            await interaction.followup.send(str(e) if isinstance(e, GSMError) else "Failed to fetch details.", ephemeral=True)
+            return None
+    return device
+
+async def show(interaction: discord.Interaction, embed):
+    if interaction.response.is_done():
+        await interaction.edit_original_response(embed=embed)
+    else:
+        await interaction.response.edit_message(embed=embed)
 
 class SpecsView(discord.ui.View):
-    def __init__(self, device):
-        super().__init__(timeout=300)
-        self.device = device
-        self.theme = ThemeManager.get_theme()
-        
-        # Setup specific commands if categories exist
-        specs = device.get('detail_spec') or device.get('detailSpec') or []
-        categories = [c.get('category') for c in specs if c.get('category')]
-        
-        if categories:
-            self.add_item(CategorySelect(categories[:25])) # Discord limit 25
-
-    def build_home_embed(self):
-        embed = discord.Embed(
-            title=self.device.get('name') or self.device.get('title') or "Specs",
-            color=int(self.theme['accent'].replace('#', ''), 16)
-        )
-        embed.set_thumbnail(url=self.device.get('img') or self.device.get('image'))
-        
-        quick = self.device.get('quick_spec') or self.device.get('quickSpec')
-        if quick and isinstance(quick, list):
-            for q in quick:
-                embed.add_field(name=q.get('name', 'Info'), value=q.get('value', 'N/A'), inline=True)
-        else:
-            embed.description = "No quick specs available."
-            
-        return embed
+    # Persistent and stateless: the components encode the device ID in their
+    # custom_id and are dispatched to the dynamic items registered in cog_load,
+    # so nothing is kept per panel and panels survive restarts.
+    def __init__(self, device_id, device):
+        super().__init__(timeout=None)
+        self.add_item(OverviewButton(device_id))
+        if device.categories:
+            self.add_item(CategorySelect(device_id, device.categories[:25])) # Discord limit 25
+
+class OverviewButton(discord.ui.DynamicItem[discord.ui.Button], template=r'gsm:home:(?P<device_id>.+)'):
+    def __init__(self, device_id):
+        super().__init__(discord.ui.Button(
+            label="Overview",
+            style=discord.ButtonStyle.secondary,
+            emoji="🏠",
+            custom_id=f"gsm:home:{device_id}"
+        ))
+        self.device_id = device_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['device_id'])
 
-    def build_category_embed(self, category_name):
-        embed = discord.Embed(
-            title=f"{self.device.get('name')} - {category_name}",
-            color=int(self.theme['accent'].replace('#', ''), 16)
-        )
-        embed.set_thumbnail(url=self.device.get('img') or self.device.get('image'))
-        
-        specs = self.device.get('detail_spec') or self.device.get('detailSpec') or []
-        cat_data = next((c for c in specs if c.get('category') == category_name), None)
-        
-        if cat_data:
-            desc = ""
-            for s in cat_data.get('specifications', []):
-                desc += f"**{s.get('name')}**: {s.get('value')}\n"
-            embed.description = desc[:4096]
-        else:
-            embed.description = "No data."
-            
-        return embed
-
-    @discord.ui.button(label="Overview", style=discord.ButtonStyle.secondary, emoji="🏠")
-    async def home(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(embed=self.build_home_embed())
+    async def callback(self, interaction: discord.Interaction):
+        device = await load_device(interaction, self.device_id)
+        if device is not None:
+            await show(interaction, device.home_embed())
 
-class CategorySelect(discord.ui.Select):
-    def __init__(self, categories):
+class CategorySelect(discord.ui.DynamicItem[discord.ui.Select], template=r'gsm:cat:(?P<device_id>.+)'):
+    def __init__(self, device_id, categories):
         options = [discord.SelectOption(label=c, description=f"View {c}") for c in categories]
-        super().__init__(placeholder="Select Specification Category", options=options, custom_id="gsm_cat_select")
+        super().__init__(discord.ui.Select(
+            placeholder="Select Specification Category",
+            options=options,
+            custom_id=f"gsm:cat:{device_id}"
+        ))
+        self.device_id = device_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        return cls(match['device_id'], [option.label for option in item.options])
 
     async def callback(self, interaction: discord.Interaction):
-        view: SpecsView = self.view
-        embed = view.build_category_embed(self.values[0])
-        await interaction.response.edit_message(embed=embed)
+        device = await load_device(interaction, self.device_id)
+        if device is not None:
+            await show(interaction, device.category_embed(self.item.values[0]))
 
 async def setup(bot):
-    await bot.add_cog(Integration(bot))
+    await bot.add_cog(Integration(bot, bot.gsm_client))
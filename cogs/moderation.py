@@ -13,16 +13,15 @@ class Moderation(commands.Cog):
     async def wipe(self, interaction: discord.Interaction):
         # Check bot permissions
         if not interaction.channel.permissions_for(interaction.guild.me).manage_messages:
-             await interaction.response.send_message(LanguageManager.t('wipe_no_perms'), ephemeral=True)
+             await interaction.response.send_message(LanguageManager.t('wipe_no_perms', interaction), ephemeral=True)
              return
 
         # Confirmation
         view = WipeConfirmView(interaction)
-        theme = ThemeManager.get_theme()
         embed = discord.Embed(
-            title=LanguageManager.t('wipe_confirm_title'),
-            description=LanguageManager.t('wipe_confirm_desc'),
-            color=int(theme['error'].replace('#', ''), 16)
+            title=LanguageManager.t('wipe_confirm_title', interaction),
+            description=LanguageManager.t('wipe_confirm_desc', interaction),
+            color=ThemeManager.get().error
         )
         
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
@@ -37,16 +36,15 @@ class WipeConfirmView(discord.ui.View):
 
     @discord.ui.button(label="Confirm Wipe", style=discord.ButtonStyle.danger) # Label from LanguageManager ideally
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(content=LanguageManager.t('wipe_in_progress'), embed=None, view=None)
+        await interaction.response.edit_message(content=LanguageManager.t('wipe_in_progress', interaction), embed=None, view=None)
         
         try:
             deleted = await interaction.channel.purge(limit=100) # Bulk delete limit
             count = len(deleted)
             
-            theme = ThemeManager.get_theme()
             success_embed = discord.Embed(
-                description=LanguageManager.t('wipe_success', count=count),
-                color=int(theme['primary'].replace('#', ''), 16)
+                description=LanguageManager.t('wipe_success', interaction, count=count),
+                color=ThemeManager.get().primary
             )
             
             # Send success message (not ephemeral, then delete)
@@ -58,12 +56,12 @@ class WipeConfirmView(discord.ui.View):
                 pass
                 
         except Exception as e:
-            await interaction.followup.send(LanguageManager.t('wipe_error'), ephemeral=True)
+            await interaction.followup.send(LanguageManager.t('wipe_error', interaction), ephemeral=True)
             print(f"Wipe error: {e}")
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(content=LanguageManager.t('wipe_cancelled'), embed=None, view=None)
+        await interaction.response.edit_message(content=LanguageManager.t('wipe_cancelled', interaction), embed=None, view=None)
 
 import asyncio
 
@@ -7,8 +7,16 @@ import pyfiglet
 from colorama import Fore, Style, init
 from discord.ext import commands
 from utils.config import Config
-from utils.language_manager import LanguageManager
+from utils.language_manager import LanguageManager, LANG_DIR, CUSTOM_STRINGS_PATH
+from utils.theme_manager import ThemeManager
+from utils.file_watcher import FileWatcher
+from utils.http_client import HttpClient
+from utils.gsm_client import GSMClient
 from utils.keep_alive_manager import KeepAliveManager
+from utils.sticky_manager import StickyManager
+from utils.command_manager import CommandManager
+from utils.storage import get_backend, close_backend, COMMANDS_PATH, THEME_PATH, LANGUAGE_SETTINGS_PATH
+from utils.logger import start_logging
 from web.app import run_web_server
 
 # Setup Logging
@@ -16,10 +24,8 @@ def setup_logging():
     logger = logging.getLogger("motionbot")
     logger.setLevel(logging.INFO)
     
-    # File handler for all logs
-    fh = logging.FileHandler("bot.log", encoding="utf-8")
-    fh.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
-    logger.addHandler(fh)
+    # bot.log and logs/ are written by a background thread behind a bounded queue
+    start_logging(logger)
     
     # Console handler for CRITICAL only (to avoid mess)
     ch = logging.StreamHandler()
@@ -41,6 +47,9 @@ class Stats:
 class MotionBot(commands.Bot):
     def __init__(self):
         self.stats = Stats()
+        # Pooled HTTP client shared by the cogs and managers
+        self.http_client = HttpClient()
+        self.gsm_client = GSMClient(self.http_client)
         intents = discord.Intents.default()
         intents.message_content = True
         intents.members = True
@@ -62,6 +71,13 @@ class MotionBot(commands.Bot):
         print(Fore.BLUE + '➜ ' + LanguageManager.t('bot_initializing'))
         print(Fore.BLUE + '➜ ' + LanguageManager.t('loading_modules'))
 
+        # Report translation keys/placeholders that drifted from the default language
+        report = LanguageManager.validate()
+        for lang_code, issues in list(report["languages"].items()) + [("custom", report["custom"])]:
+            problems = {k: v for k, v in issues.items() if v}
+            if problems:
+                logger.warning(f"Translation issues in {lang_code}: {problems}")
+
         # Load Cogs
         for filename in os.listdir('./cogs'):
             if filename.endswith('.py'):
@@ -70,16 +86,23 @@ class MotionBot(commands.Bot):
                 except Exception as e:
                     logger.error(f'Failed to load extension {filename}: {e}')
         
-        # Global Tree Check for Command Toggles
+        # Hot reload of strings, theme and command toggles. With SQLite the theme and
+        # toggles live in the database, so they are polled instead of file-watched.
+        sqlite = get_backend().name == 'sqlite'
+        FileWatcher.register('language', [LANG_DIR, CUSTOM_STRINGS_PATH] + ([] if sqlite else [LANGUAGE_SETTINGS_PATH]), LanguageManager.reload)
+        FileWatcher.register('theme', [] if sqlite else [THEME_PATH], ThemeManager.reload, poll=sqlite)
+        FileWatcher.register('commands', [] if sqlite else [COMMANDS_PATH], CommandManager.refresh_if_changed, poll=sqlite)
+        FileWatcher.start()
+
+        # Global Tree Check for Command Toggles (served from the in-memory policy table)
         async def global_check(interaction: discord.Interaction) -> bool:
-            from utils.command_manager import CommandManager
             if not interaction.command:
                 return True
             
             root_command = interaction.command.root_parent or interaction.command
             if not CommandManager.is_command_enabled(root_command.name, interaction.guild_id):
                 await interaction.response.send_message(
-                    LanguageManager.t('command_disabled') if 'command_disabled' in LanguageManager._cache.get(LanguageManager._current_lang, {}) else "This command is disabled.",
+                    LanguageManager.t('command_disabled', interaction) if LanguageManager.has('command_disabled', interaction) else "This command is disabled.",
                     ephemeral=True
                 )
                 return False
@@ -87,8 +110,14 @@ class MotionBot(commands.Bot):
 
         self.tree.interaction_check = global_check
 
+        # Load sticky messages into memory and start the write-behind flush
+        StickyManager.start()
+
+        # Warm the GSM device cache from disk
+        await self.gsm_client.warm()
+
         # Start GSMArena Keep-Alive
-        await KeepAliveManager.start()
+        await KeepAliveManager.start(self.http_client)
         
         # Start Web Dashboard
         self.loop.create_task(run_web_server(self))
@@ -103,6 +132,16 @@ class MotionBot(commands.Bot):
         await self.tree.sync()
         print(Fore.CYAN + '  ℹ ' + Style.BRIGHT + 'System: ' + Style.NORMAL + "Dashboard running at " + Fore.BLUE + f"http://localhost:{Config.PORT}")
 
+    async def close(self):
+        # Persist any pending sticky updates before shutting down
+        await StickyManager.stop()
+        await FileWatcher.stop()
+        await KeepAliveManager.stop()
+        await self.gsm_client.close()
+        await super().close()
+        await self.http_client.close()
+        close_backend()
+
     @commands.Cog.listener()
     async def on_app_command_completion(self, interaction, command):
         self.stats.commands_ran += 1
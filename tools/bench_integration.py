@@ -0,0 +1,190 @@
+# Load benchmark for cogs/integration.py. Starts the mock GSM API in-process (or
+# targets --url), then fires concurrent synthetic /gsm search and /gsm specs
+# interactions at the cog, with Zipf-distributed popularity, and reports answer
+# latency percentiles, upstream request counts, cache statistics and memory.
+#
+#   python tools/bench_integration.py --requests 2000 --concurrency 50
+#   python tools/bench_integration.py --no-cache --latency 300
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import discord
+from utils.config import Config
+from utils.http_client import HttpClient
+from utils.gsm_client import GSMClient
+from mock_gsm_server import add_arguments, from_arguments, start
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+        self.interaction.deferred = True
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self.interaction.answer(content, kwargs)
+
+    async def edit_message(self, **kwargs):
+        self._done = True
+        self.interaction.answer(None, kwargs)
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self.interaction.answer(content, kwargs)
+
+class FakeInteraction:
+    # Just enough of discord.Interaction for the integration cog
+    def __init__(self, client, guild_id):
+        self.client = client
+        self.guild_id = guild_id
+        self.created_at = discord.utils.utcnow()
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.deferred = False
+        self.answered_at = None
+        self.ok = False
+
+    def answer(self, content, kwargs):
+        if self.answered_at is None:
+            self.answered_at = time.perf_counter()
+            self.ok = 'embed' in kwargs
+
+    async def edit_original_response(self, **kwargs):
+        self.answer(None, kwargs)
+
+class FakeBot:
+    def __init__(self, gsm_client):
+        self.gsm_client = gsm_client
+
+    def add_dynamic_items(self, *items):
+        pass
+
+def zipf_choices(population, count, exponent):
+    weights = [1 / (rank ** exponent) for rank in range(1, len(population) + 1)]
+    return random.choices(population, weights=weights, k=count)
+
+def build_workload(catalog, args):
+    device_ids = list(catalog)
+    random.shuffle(device_ids)
+    picks = zipf_choices(device_ids, args.requests, args.zipf)
+    workload = []
+    for device_id in picks:
+        if random.random() < args.specs_ratio:
+            workload.append(('specs', device_id))
+        else:
+            # Users type part of the name: brand and model, sometimes only the model
+            words = catalog[device_id].lower().split()
+            workload.append(('search', ' '.join(words[-2:] if random.random() < 0.5 else words)))
+    return workload
+
+def percentiles(samples):
+    if len(samples) < 2:
+        return {"count": len(samples)}
+    cuts = statistics.quantiles(samples, n=100)
+    return {
+        "count": len(samples),
+        "p50": round(cuts[49] * 1000, 2),
+        "p95": round(cuts[94] * 1000, 2),
+        "p99": round(cuts[98] * 1000, 2),
+        "max": round(max(samples) * 1000, 2),
+    }
+
+def configure(args, base_url):
+    Config.GSM_BASE_URL = base_url
+    Config.GSM_STORE_PATH = args.store or ''
+    Config.GSM_PREFETCH = args.prefetch
+    Config.GSM_HEDGE_AFTER = args.hedge_after
+    if args.no_cache:
+        Config.GSM_SEARCH_TTL = Config.GSM_DEVICE_TTL = Config.GSM_STALE_TTL = 0
+
+async def run(args):
+    from cogs.integration import Integration
+
+    random.seed(args.seed)
+    mock = from_arguments(args)
+    runner, base_url = await start(mock)
+    configure(args, args.url or base_url)
+
+    tracemalloc.start()
+    http_client = HttpClient()
+    gsm = GSMClient(http_client)
+    bot = FakeBot(gsm)
+    cog = Integration(bot, gsm)
+    workload = build_workload(mock.catalog, args)
+
+    slots = asyncio.Semaphore(args.concurrency)
+    results = {"search": [], "specs": []}
+    counts = {"deferred": 0, "failed": 0}
+
+    async def one(kind, argument):
+        async with slots:
+            interaction = FakeInteraction(bot, random.randint(1, args.guilds))
+            started = time.perf_counter()
+            command = cog.search if kind == 'search' else cog.specs
+            await command.callback(cog, interaction, argument)
+            if interaction.answered_at is not None:
+                results[kind].append(interaction.answered_at - started)
+            counts["deferred"] += interaction.deferred
+            counts["failed"] += not interaction.ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(kind, argument) for kind, argument in workload))
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.2)  # let background refreshes/prefetches settle
+    current, peak = tracemalloc.get_traced_memory()
+
+    upstream = mock.stats_dict() if not args.url else None
+    print(f"{len(workload)} interactions in {elapsed:.2f}s ({len(workload) / elapsed:.0f}/s), concurrency {args.concurrency}")
+    for kind, samples in results.items():
+        print(f"  {kind:6} latency (ms): {percentiles(samples)}")
+    print(f"  deferred: {counts['deferred']}, failed answers: {counts['failed']}")
+    if upstream:
+        print(f"  upstream requests: {upstream}")
+    stats = gsm.stats()
+    print(f"  search cache: {stats['search']}")
+    print(f"  device cache: {stats['device']}")
+    print(f"  coalescing: {stats['coalescing']}, prefetch: {stats['prefetch']}")
+    print(f"  upstream client: {gsm.upstream}, breaker: {gsm.breaker.state}")
+    print(f"  memory (tracemalloc): current {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB")
+
+    await gsm.close()
+    await http_client.close()
+    await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the /gsm commands against a mock GSM API")
+    parser.add_argument("--url", help="benchmark an existing GSM API instead of the in-process mock")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--specs-ratio", type=float, default=0.6, help="fraction of /gsm specs interactions")
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew of the devices asked about")
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-cache", action="store_true", help="disable the GSM response caches")
+    parser.add_argument("--prefetch", action="store_true", help="enable speculative prefetch")
+    parser.add_argument("--hedge-after", type=float, default=0, help="hedge requests slower than this (s)")
+    parser.add_argument("--store", help="path of an on-disk device store to use")
+    add_arguments(parser)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
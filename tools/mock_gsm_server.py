@@ -0,0 +1,165 @@
+# Local stand-in for the GSMArena API used by the /gsm commands. Serves
+# /search?q= and /device/{id} from a synthetic catalog with configurable latency,
+# error rate and payload size, and counts requests at /stats.
+#
+#   python tools/mock_gsm_server.py --port 8100 --latency 150 --error-rate 0.02
+#   GSM_BASE_URL=http://127.0.0.1:8100 python main.py
+import argparse
+import asyncio
+import random
+from collections import Counter
+from aiohttp import web
+
+BRANDS = [
+    "Samsung Galaxy S", "Samsung Galaxy A", "Google Pixel", "Apple iPhone", "Xiaomi Redmi Note",
+    "OnePlus", "Motorola Moto G", "Sony Xperia", "Nokia", "Oppo Reno", "Vivo X", "Realme GT",
+]
+CATEGORIES = [
+    "Network", "Launch", "Body", "Display", "Platform", "Memory", "Main Camera", "Selfie camera",
+    "Sound", "Comms", "Features", "Battery", "Misc", "Tests",
+]
+
+def build_catalog(models_per_brand):
+    catalog = {}
+    for brand_no, brand in enumerate(BRANDS):
+        for model in range(1, models_per_brand + 1):
+            name = f"{brand}{model}"
+            device_id = f"{name.lower().replace(' ', '_')}-{brand_no * 1000 + model}"
+            catalog[device_id] = name
+    return catalog
+
+class MockGSM:
+    def __init__(self, models_per_brand=40, latency=100, jitter=50, error_rate=0.0, hang_rate=0.0,
+                 categories=12, specs_per_category=8, value_size=40, search_limit=50):
+        self.catalog = build_catalog(models_per_brand)
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.categories = CATEGORIES[:categories]
+        self.specs_per_category = specs_per_category
+        self.value_size = value_size
+        self.search_limit = search_limit
+        self.requests = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _delay(self):
+        if self.hang_rate and random.random() < self.hang_rate:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+    def _failed(self):
+        return self.error_rate and random.random() < self.error_rate
+
+    @web.middleware
+    async def track(self, request, handler):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def root(self, request):
+        self.requests["root"] += 1
+        return web.json_response({"status": "ok"})
+
+    async def search(self, request):
+        self.requests["search"] += 1
+        await self._delay()
+        if self._failed():
+            self.requests["errors"] += 1
+            return web.json_response({"error": "upstream failure"}, status=503)
+
+        words = request.query.get("q", "").lower().split()
+        results = [
+            {"id": device_id, "name": name, "img": f"https://example.invalid/{device_id}.jpg"}
+            for device_id, name in self.catalog.items()
+            if all(word in name.lower() for word in words)
+        ]
+        return web.json_response({"data": results[:self.search_limit]})
+
+    async def device(self, request):
+        self.requests["device"] += 1
+        await self._delay()
+        if self._failed():
+            self.requests["errors"] += 1
+            return web.json_response({"error": "upstream failure"}, status=503)
+
+        device_id = request.match_info["id"]
+        name = self.catalog.get(device_id)
+        if name is None:
+            return web.json_response({"error": "Device not found"})
+
+        value = "x" * self.value_size
+        return web.json_response({
+            "name": name,
+            "img": f"https://example.invalid/{device_id}.jpg",
+            "quick_spec": [{"name": c, "value": value} for c in self.categories[:6]],
+            "detail_spec": [
+                {
+                    "category": category,
+                    "specifications": [{"name": f"{category} {i}", "value": value} for i in range(self.specs_per_category)],
+                }
+                for category in self.categories
+            ],
+        })
+
+    async def stats(self, request):
+        return web.json_response(self.stats_dict())
+
+    def stats_dict(self):
+        return {**self.requests, "maxInFlight": self.max_in_flight, "devices": len(self.catalog)}
+
+    def reset(self):
+        self.requests.clear()
+        self.max_in_flight = 0
+
+    def create_app(self):
+        app = web.Application(middlewares=[self.track])
+        app.router.add_get("/", self.root)
+        app.router.add_get("/search", self.search)
+        app.router.add_get("/device/{id}", self.device)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+async def start(mock, host="127.0.0.1", port=0):
+    # Runs the server in the current loop; returns (runner, base_url)
+    runner = web.AppRunner(mock.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}"
+
+def add_arguments(parser):
+    parser.add_argument("--models", type=int, default=40, help="models per brand in the catalog")
+    parser.add_argument("--latency", type=float, default=100, help="mean response latency (ms)")
+    parser.add_argument("--jitter", type=float, default=50, help="latency standard deviation (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+    parser.add_argument("--categories", type=int, default=12, help="spec categories per device")
+    parser.add_argument("--specs", type=int, default=8, help="specifications per category")
+    parser.add_argument("--value-size", type=int, default=40, help="characters per specification value")
+
+def from_arguments(args):
+    return MockGSM(
+        models_per_brand=args.models, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, hang_rate=args.hang_rate, categories=args.categories,
+        specs_per_category=args.specs, value_size=args.value_size,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock GSMArena API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    mock = from_arguments(args)
+    print(f"Mock GSM API with {len(mock.catalog)} devices on http://{args.host}:{args.port}")
+    web.run_app(mock.create_app(), host=args.host, port=args.port, print=None, access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,136 @@
-import json
-import os
-
-CONFIG_PATH = 'commands_config.json'
+import asyncio
+from types import MappingProxyType
+from utils.storage import get_backend
 
 class CommandManager:
+    # Resolved policy table, rebuilt whenever the config changes:
+    #   _global_policy: frozen {command: enabled} of the global defaults
+    #   _policies:      {guild_id: frozen global defaults merged with the guild's overrides}
+    # Lookups in the interaction check are plain dict hits with no file I/O.
+    _config = None
+    _global_policy = MappingProxyType({})
+    _policies = {}
+    _version_token = None
+    _generation = 0
+
     @staticmethod
     def get_config():
-        if not os.path.exists(CONFIG_PATH):
-            return {"global": {}, "guilds": {}}
         try:
-            with open(CONFIG_PATH, 'r') as f:
-                return json.load(f)
+            return get_backend().load_command_config()
         except:
             return {"global": {}, "guilds": {}}
 
     @staticmethod
-    def save_config(config):
-        with open(CONFIG_PATH, 'w') as f:
-            json.dump(config, f, indent=4)
+    def save_config(config, changes):
+        # changes: [(guild_id or None, command_name, enabled or None to clear)] applied to `config`
+        get_backend().save_command_config(config, changes)
 
     @classmethod
-    def set_command_status(cls, command_name, enabled, guild_id=None):
-        config = cls.get_config()
-        
+    def _apply(cls, config, version_token):
+        global_policy = MappingProxyType(dict(config.get("global", {})))
+        policies = {}
+        for g_id, overrides in config.get("guilds", {}).items():
+            if overrides:
+                merged = dict(global_policy)
+                merged.update(overrides)
+                policies[str(g_id)] = MappingProxyType(merged)
+
+        # Swap everything in at once
+        cls._config = config
+        cls._global_policy = global_policy
+        cls._policies = policies
+        cls._version_token = version_token
+        cls._generation += 1
+
+    @classmethod
+    def reload(cls):
+        token = get_backend().command_config_version()
+        cls._apply(cls.get_config(), token)
+
+    @classmethod
+    def _ensure_loaded(cls):
+        if cls._config is None:
+            cls.reload()
+
+    @classmethod
+    def get_policy(cls, guild_id=None):
+        cls._ensure_loaded()
         if guild_id:
-            if str(guild_id) not in config["guilds"]:
-                config["guilds"][str(guild_id)] = {}
-            config["guilds"][str(guild_id)][command_name] = enabled
-        else:
-            config["global"][command_name] = enabled
-            
-        cls.save_config(config)
+            return cls._policies.get(str(guild_id), cls._global_policy)
+        return cls._global_policy
+
+    @classmethod
+    def _copy_config(cls):
+        cls._ensure_loaded()
+        return {
+            "global": dict(cls._config["global"]),
+            "guilds": {g_id: dict(toggles) for g_id, toggles in cls._config["guilds"].items()}
+        }
+
+    @classmethod
+    def _commit(cls, config, changes):
+        # One write for the whole batch, then swap in the new policy table
+        cls.save_config(config, changes)
+        cls._apply(config, get_backend().command_config_version())
+
+    @classmethod
+    def set_command_status(cls, command_name, enabled, guild_id=None):
+        cls.set_command_statuses([(guild_id, command_name, enabled)])
+
+    @classmethod
+    def set_command_statuses(cls, changes):
+        # changes: [(guild_id or None, command_name, enabled)]
+        config = cls._copy_config()
+        for guild_id, command_name, enabled in changes:
+            if guild_id:
+                if str(guild_id) not in config["guilds"]:
+                    config["guilds"][str(guild_id)] = {}
+                config["guilds"][str(guild_id)][command_name] = enabled
+            else:
+                config["global"][command_name] = enabled
+
+        cls._commit(config, changes)
+
+    @classmethod
+    def copy_guild_policy(cls, source_guild_id, target_guild_ids):
+        # Replace the overrides of every target guild with the source guild's
+        config = cls._copy_config()
+        source = dict(config["guilds"].get(str(source_guild_id), {}))
+        changes = []
+        for target_id in target_guild_ids:
+            target_id = str(target_id)
+            if target_id == str(source_guild_id):
+                continue
+            for command_name in config["guilds"].get(target_id, {}):
+                if command_name not in source:
+                    changes.append((target_id, command_name, None))
+            for command_name, enabled in source.items():
+                changes.append((target_id, command_name, enabled))
+
+            if source:
+                config["guilds"][target_id] = dict(source)
+            else:
+                config["guilds"].pop(target_id, None)
+
+        cls._commit(config, changes)
+        return len(changes)
 
     @classmethod
     def is_command_enabled(cls, command_name, guild_id=None):
-        config = cls.get_config()
-        
-        # 1. Guild Specific
-        if guild_id:
-            guild_config = config.get("guilds", {}).get(str(guild_id), {})
-            if command_name in guild_config:
-                return guild_config[command_name]
-        
-        # 2. Global Setting
-        if command_name in config.get("global", {}):
-            return config["global"][command_name]
-            
-        # 3. Default True
+        # Guild override, then global setting, then enabled by default
+        return cls.get_policy(guild_id).get(command_name, True)
+
+    @classmethod
+    async def refresh_if_changed(cls, force=False):
+        # Picks up edits made outside this process (file edits, other bot processes)
+        token = get_backend().command_config_version()
+        if token == cls._version_token and not force:
+            return False
+
+        generation = cls._generation
+        config = await asyncio.to_thread(cls.get_config)
+        if generation != cls._generation:
+            # A local write landed while loading; it is newer than what we read
+            return False
+        cls._apply(config, token)
         return True
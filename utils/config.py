@@ -11,3 +11,80 @@ class Config:
     GSM_KEEP_ALIVE = os.getenv('GSM_KEEP_ALIVE', 'false').lower() == 'true'
     LAN_ACCESS = os.getenv('DASHBOARD_LAN_ACCESS', 'false').lower() == 'true'
     PORT = int(os.getenv('PORT', 3000))
+    # File logging: 'text' or 'json', queue bound, overflow policy
+    # ('drop_new' or 'drop_old') and records written per batch
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_OVERFLOW = os.getenv('LOG_OVERFLOW', 'drop_new').lower()
+    LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', 500))
+    # Log rotation: size per file, compression of closed files ('gzip', 'zstd'
+    # when the zstandard package is installed, or 'none'), retention and the
+    # number of indexed errors the dashboard can search
+    LOG_MAX_MB = int(os.getenv('LOG_MAX_MB', 10))
+    LOG_COMPRESSION = os.getenv('LOG_COMPRESSION', 'gzip').lower()
+    LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', 14))
+    LOG_MAX_TOTAL_MB = int(os.getenv('LOG_MAX_TOTAL_MB', 500))
+    LOG_INDEX_SIZE = int(os.getenv('LOG_INDEX_SIZE', 10000))
+    # App-command error aggregation: fingerprints kept, samples per fingerprint and
+    # seconds between two full traces of the same fingerprint
+    ERROR_TRACKER_SIZE = int(os.getenv('ERROR_TRACKER_SIZE', 500))
+    ERROR_SAMPLES = int(os.getenv('ERROR_SAMPLES', 5))
+    ERROR_TRACE_WINDOW = int(os.getenv('ERROR_TRACE_WINDOW', 3600))
+    # Shared outbound HTTP client (GSM API, keep-alive, dashboard)
+    HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', 100))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', 20))
+    HTTP_DNS_TTL = int(os.getenv('HTTP_DNS_TTL', 300))
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 15))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+    # Adaptive keep-alive of the GSM API (seconds): normal, backed-off (while real
+    # traffic keeps it warm) and after-failure probe intervals, health window size
+    # and the consecutive failures after which lookups fail fast
+    KEEP_ALIVE_INTERVAL = float(os.getenv('KEEP_ALIVE_INTERVAL', 15))
+    KEEP_ALIVE_MAX_INTERVAL = float(os.getenv('KEEP_ALIVE_MAX_INTERVAL', 120))
+    KEEP_ALIVE_FAST_INTERVAL = float(os.getenv('KEEP_ALIVE_FAST_INTERVAL', 3))
+    KEEP_ALIVE_TIMEOUT = float(os.getenv('KEEP_ALIVE_TIMEOUT', 5))
+    KEEP_ALIVE_WINDOW = int(os.getenv('KEEP_ALIVE_WINDOW', 50))
+    KEEP_ALIVE_DOWN_AFTER = int(os.getenv('KEEP_ALIVE_DOWN_AFTER', 3))
+    # GSMArena response caches (sizes in entries, TTLs in seconds). Expired
+    # entries are served for up to GSM_STALE_TTL more while being refreshed.
+    GSM_SEARCH_CACHE_SIZE = int(os.getenv('GSM_SEARCH_CACHE_SIZE', 500))
+    GSM_SEARCH_TTL = int(os.getenv('GSM_SEARCH_TTL', 3600))
+    GSM_DEVICE_CACHE_SIZE = int(os.getenv('GSM_DEVICE_CACHE_SIZE', 1000))
+    GSM_DEVICE_TTL = int(os.getenv('GSM_DEVICE_TTL', 21600))
+    GSM_STALE_TTL = int(os.getenv('GSM_STALE_TTL', 86400))
+    GSM_INDEX_SIZE = int(os.getenv('GSM_INDEX_SIZE', 5000))
+    # Prefetch device details of the top search hits (per-guild budget is per hour)
+    GSM_PREFETCH = os.getenv('GSM_PREFETCH', 'false').lower() == 'true'
+    GSM_PREFETCH_COUNT = int(os.getenv('GSM_PREFETCH_COUNT', 2))
+    GSM_PREFETCH_CONCURRENCY = int(os.getenv('GSM_PREFETCH_CONCURRENCY', 2))
+    GSM_PREFETCH_GUILD_BUDGET = int(os.getenv('GSM_PREFETCH_GUILD_BUDGET', 30))
+    # GSM upstream resilience (seconds): per-request timeout, overall deadline of
+    # a lookup, retries with jittered backoff, circuit breaker and hedging (0 = off)
+    GSM_REQUEST_TIMEOUT = float(os.getenv('GSM_REQUEST_TIMEOUT', 8))
+    GSM_DEADLINE = float(os.getenv('GSM_DEADLINE', 30))
+    GSM_RETRIES = int(os.getenv('GSM_RETRIES', 2))
+    GSM_RETRY_BASE = float(os.getenv('GSM_RETRY_BASE', 0.5))
+    GSM_RETRY_MAX = float(os.getenv('GSM_RETRY_MAX', 4))
+    GSM_BREAKER_THRESHOLD = int(os.getenv('GSM_BREAKER_THRESHOLD', 5))
+    GSM_BREAKER_RESET = float(os.getenv('GSM_BREAKER_RESET', 30))
+    GSM_HEDGE_AFTER = float(os.getenv('GSM_HEDGE_AFTER', 0))
+    # On-disk device cache (empty path disables it)
+    GSM_STORE_PATH = os.getenv('GSM_STORE_PATH', 'gsm_cache.db')
+    GSM_STORE_MAX_MB = int(os.getenv('GSM_STORE_MAX_MB', 64))
+    # Persistent state: 'json' (flat files) or 'sqlite' (single WAL database)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json').lower()
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'motionbot.db')
+    # Compiled translation catalogs kept in memory besides the default language
+    LANGUAGE_CACHE_SIZE = int(os.getenv('LANGUAGE_CACHE_SIZE', 4))
+    # Seconds between checks for command toggle changes made outside the bot
+    CONFIG_POLL_INTERVAL = float(os.getenv('CONFIG_POLL_INTERVAL', 2))
+    # Sticky reposts are coalesced per channel: wait for this many seconds of quiet,
+    # but never delay a repost longer than STICKY_MAX_DELAY after the first message
+    STICKY_QUIET_WINDOW = float(os.getenv('STICKY_QUIET_WINDOW', 2))
+    STICKY_MAX_DELAY = float(os.getenv('STICKY_MAX_DELAY', 10))
+    # Startup/resume sticky reconciliation: channels checked in parallel, and how
+    # many recent messages are scanned per channel for orphaned sticky copies
+    STICKY_RECONCILE_CONCURRENCY = int(os.getenv('STICKY_RECONCILE_CONCURRENCY', 8))
+    STICKY_RECONCILE_HISTORY = int(os.getenv('STICKY_RECONCILE_HISTORY', 20))
+    # Live stickies edited in parallel when the theme changes
+    STICKY_REFRESH_CONCURRENCY = int(os.getenv('STICKY_REFRESH_CONCURRENCY', 5))
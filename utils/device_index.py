@@ -0,0 +1,103 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+class DeviceIndex:
+    # Size-bounded in-memory index of device names and IDs for autocomplete,
+    # fed by every search/specs response. Matches by prefix (of the name, of any
+    # word in it, or of the ID) and by trigram overlap, which tolerates typos.
+    def __init__(self, maxsize, min_similarity=0.3):
+        self.maxsize = maxsize
+        self.min_similarity = min_similarity
+        self._entries = OrderedDict()  # device_id -> (name, normalized name)
+        self._trigrams = {}            # trigram -> set of device_ids
+        self._keys = []                # sorted (prefix key, score, device_id) for bisect lookups
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(str(text).lower().split())
+
+    @staticmethod
+    def trigrams(text):
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @classmethod
+    def prefix_keys(cls, device_id, normalized):
+        # The full name and the ID score 3; the name from any later word on scores 2
+        keys = {device_id.lower(): 3.0, normalized: 3.0}
+        words = normalized.split()
+        for i in range(1, len(words)):
+            keys.setdefault(' '.join(words[i:]), 2.0)
+        return [(key, score, device_id) for key, score in keys.items()]
+
+    def add(self, device_id, name):
+        if not device_id or not name:
+            return
+        device_id = str(device_id)
+        name = str(name)
+        entry = self._entries.get(device_id)
+        if entry is not None and entry[0] == name:
+            self._entries.move_to_end(device_id)
+            return
+        if entry is not None:
+            self._remove(device_id)
+
+        normalized = self.normalize(name)
+        self._entries[device_id] = (name, normalized)
+        for gram in self.trigrams(normalized):
+            self._trigrams.setdefault(gram, set()).add(device_id)
+        for key in self.prefix_keys(device_id, normalized):
+            insort(self._keys, key)
+
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def add_devices(self, devices):
+        for device in devices:
+            self.add(device.get('id') or device.get('slug'), device.get('name') or device.get('title'))
+
+    def _remove(self, device_id):
+        _, normalized = self._entries.pop(device_id)
+        for gram in self.trigrams(normalized):
+            ids = self._trigrams.get(gram)
+            if ids:
+                ids.discard(device_id)
+                if not ids:
+                    del self._trigrams[gram]
+        for key in self.prefix_keys(device_id, normalized):
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def search(self, text, limit=25):
+        # Returns [(device_id, name)], best matches first
+        query = self.normalize(text)
+        if not query:
+            return [(d, e[0]) for d, e in reversed(self._entries.items())][:limit]
+
+        scores = {}
+        for i in range(bisect_left(self._keys, (query,)), len(self._keys)):
+            key, score, device_id = self._keys[i]
+            if not key.startswith(query):
+                break
+            if score > scores.get(device_id, 0):
+                scores[device_id] = score
+
+        query_grams = self.trigrams(query)
+        counts = {}
+        for gram in query_grams:
+            for device_id in self._trigrams.get(gram, ()):
+                counts[device_id] = counts.get(device_id, 0) + 1
+        for device_id, shared in counts.items():
+            similarity = shared / len(query_grams)
+            if similarity >= self.min_similarity:
+                scores[device_id] = max(scores.get(device_id, 0), similarity)
+
+        ranked = sorted(scores, key=lambda d: (-scores[d], len(self._entries[d][1])))
+        return [(d, self._entries[d][0]) for d in ranked[:limit]]
+
+    def stats(self):
+        return {"size": len(self._entries), "maxSize": self.maxsize, "trigrams": len(self._trigrams)}
@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    id TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS devices_accessed ON devices (accessed_at);
+"""
+
+SQL_GET = "SELECT payload, fetched_at FROM devices WHERE id = ?"
+SQL_TOUCH = "UPDATE devices SET accessed_at = ? WHERE id = ?"
+SQL_ADD_LOOKUPS = "UPDATE devices SET hits = hits + ? WHERE id = ?"
+SQL_PUT = (
+    "INSERT INTO devices (id, payload, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET payload = excluded.payload, size = excluded.size, "
+    "fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at"
+)
+SQL_SIZE = "SELECT size FROM devices WHERE id = ?"
+SQL_TOTAL = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM devices"
+SQL_OLDEST = "SELECT id, size FROM devices ORDER BY accessed_at LIMIT ?"
+SQL_DELETE = "DELETE FROM devices WHERE id = ?"
+SQL_POPULAR = "SELECT id, payload, fetched_at FROM devices ORDER BY hits DESC, accessed_at DESC LIMIT ?"
+
+class DeviceStore:
+    # On-disk copy of GSM device payloads (zlib-compressed JSON in SQLite), so a
+    # restart starts warm and lookups can fall back to it while the API is down.
+    # Entries keep their fetch time; the least recently used ones are evicted
+    # once the payloads exceed `max_bytes`. Blocking: call it via asyncio.to_thread.
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._count, self._bytes = self._conn.execute(SQL_TOTAL).fetchone()
+
+    @staticmethod
+    def _encode(device):
+        return zlib.compress(json.dumps(device, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _decode(payload):
+        return json.loads(zlib.decompress(payload))
+
+    def get(self, device_id):
+        # Returns (device, fetched_at), or (None, None)
+        with self._lock:
+            row = self._conn.execute(SQL_GET, (device_id,)).fetchone()
+            if row is None:
+                return None, None
+            self._conn.execute(SQL_TOUCH, (time.time(), device_id))
+        return self._decode(row[0]), row[1]
+
+    def put(self, device_id, device, fetched_at=None):
+        payload = self._encode(device)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(SQL_SIZE, (device_id,)).fetchone()
+            self._conn.execute(SQL_PUT, (device_id, payload, len(payload), fetched_at or now, now))
+            if previous:
+                self._bytes -= previous[0]
+            else:
+                self._count += 1
+            self._bytes += len(payload)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries down to 90% of the budget
+        target = self.max_bytes * 0.9
+        self._conn.execute("BEGIN")
+        try:
+            while self._bytes > target and self._count > 0:
+                rows = self._conn.execute(SQL_OLDEST, (64,)).fetchall()
+                if not rows:
+                    # The counters drifted from the table (e.g. rows removed by
+                    # hand): re-sync them instead of looping forever
+                    self._count, self._bytes = self._conn.execute(SQL_TOTAL).fetchone()
+                    break
+                for device_id, size in rows:
+                    self._conn.execute(SQL_DELETE, (device_id,))
+                    self._bytes -= size
+                    self._count -= 1
+                    self.evictions += 1
+                    if self._bytes <= target:
+                        break
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def add_lookups(self, counts):
+        # counts: {device_id: lookups} made since the last call, for popular()
+        with self._lock:
+            self._conn.executemany(SQL_ADD_LOOKUPS, [(n, device_id) for device_id, n in counts.items()])
+
+    def popular(self, limit):
+        # Most looked up entries first: [(device_id, device, fetched_at)]
+        with self._lock:
+            rows = self._conn.execute(SQL_POPULAR, (limit,)).fetchall()
+        return [(device_id, self._decode(payload), fetched_at) for device_id, payload, fetched_at in rows]
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "entries": self._count,
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import time
+import traceback
+from collections import OrderedDict, deque
+from utils.config import Config
+
+class ErrorTracker:
+    # Aggregates app-command failures by fingerprint (exception type plus the
+    # file/function path of its stack, without line numbers, so it survives
+    # unrelated edits). Keeps counts, first/last seen and a few sample payloads
+    # in a bounded table, and says when a full trace is due: once per
+    # fingerprint per ERROR_TRACE_WINDOW.
+    _errors = OrderedDict()  # fingerprint -> entry, least recently seen first
+    total = 0
+    suppressed = 0
+
+    @staticmethod
+    def unwrap(error):
+        # CommandInvokeError and friends wrap the exception raised by the command
+        while getattr(error, 'original', None) is not None and error.original is not error:
+            error = error.original
+        return error
+
+    @classmethod
+    def fingerprint(cls, error):
+        error = cls.unwrap(error)
+        frames = traceback.extract_tb(error.__traceback__)
+        stack = '|'.join(f"{os.path.basename(frame.filename)}:{frame.name}" for frame in frames)
+        kind = f"{type(error).__module__}.{type(error).__qualname__}"
+        return hashlib.sha1(f"{kind}|{stack}".encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def record(cls, error, command_name, payload=None):
+        # Returns (entry, write_trace)
+        original = cls.unwrap(error)
+        fingerprint = cls.fingerprint(error)
+        now = time.time()
+        cls.total += 1
+
+        entry = cls._errors.get(fingerprint)
+        if entry is None:
+            entry = {
+                "fingerprint": fingerprint,
+                "type": type(original).__name__,
+                "message": str(original)[:500],
+                "count": 0,
+                "commands": {},
+                "firstSeen": now,
+                "lastSeen": now,
+                "lastTrace": None,
+                "sinceTrace": 0,
+                "logPath": None,
+                "samples": deque(maxlen=Config.ERROR_SAMPLES),
+            }
+            cls._errors[fingerprint] = entry
+            while len(cls._errors) > Config.ERROR_TRACKER_SIZE:
+                cls._errors.popitem(last=False)
+        else:
+            cls._errors.move_to_end(fingerprint)
+
+        entry["count"] += 1
+        entry["lastSeen"] = now
+        entry["commands"][command_name] = entry["commands"].get(command_name, 0) + 1
+        entry["samples"].append({"time": now, "command": command_name, "message": str(original)[:500], **(payload or {})})
+
+        # The window starts once the trace is actually written (trace_written)
+        write_trace = entry["lastTrace"] is None or now - entry["lastTrace"] >= Config.ERROR_TRACE_WINDOW
+        if not write_trace:
+            entry["sinceTrace"] += 1
+            cls.suppressed += 1
+        return entry, write_trace
+
+    @classmethod
+    def trace_written(cls, entry, log_path):
+        entry["lastTrace"] = time.time()
+        entry["logPath"] = log_path
+        entry["sinceTrace"] = 0
+
+    @classmethod
+    def trace_dropped(cls, entry):
+        # The log queue was full: count it as a repeat, the next one tries again
+        entry["sinceTrace"] += 1
+
+    @staticmethod
+    def _public(entry, samples=False):
+        data = {k: v for k, v in entry.items() if k != "samples"}
+        if samples:
+            data["samples"] = list(entry["samples"])
+        return data
+
+    @classmethod
+    def top(cls, limit=20, sort='count'):
+        key = (lambda e: e["lastSeen"]) if sort == 'recent' else (lambda e: (e["count"], e["lastSeen"]))
+        entries = sorted(cls._errors.values(), key=key, reverse=True)[:limit]
+        return [cls._public(entry) for entry in entries]
+
+    @classmethod
+    def get(cls, fingerprint):
+        entry = cls._errors.get(fingerprint)
+        return cls._public(entry, samples=True) if entry else None
+
+    @classmethod
+    def stats(cls):
+        return {
+            "fingerprints": len(cls._errors),
+            "maxFingerprints": Config.ERROR_TRACKER_SIZE,
+            "total": cls.total,
+            "suppressedTraces": cls.suppressed,
+            "traceWindow": Config.ERROR_TRACE_WINDOW,
+        }
+
+    @classmethod
+    def clear(cls):
+        cls._errors.clear()
+        cls.total = 0
+        cls.suppressed = 0
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import time
+from utils.config import Config
+
+try:
+    from watchfiles import awatch
+except ImportError:  # Optional: fall back to polling mtimes
+    awatch = None
+
+logger = logging.getLogger("motionbot")
+
+class FileWatcher:
+    # Hot reload of on-disk state. Each target names the files/directories it
+    # depends on and an async `reload(force)` that reads off the event loop and
+    # swaps the new state in atomically. Changes are picked up through inotify
+    # (watchfiles) when available, otherwise by polling mtimes. Targets with
+    # poll=True also get their reload called every interval (e.g. state in SQLite,
+    # where the reload itself checks a cheap change token).
+    _targets = {}
+    _task = None
+
+    @classmethod
+    def register(cls, name, paths, reload, poll=False):
+        cls._targets[name] = {
+            "paths": [os.path.abspath(p) for p in paths],
+            "reload": reload,
+            "poll": poll,
+            "signature": None,
+            "watched": False,
+            "reloads": 0,
+            "last_reload": None,
+            "last_duration": None,
+            "last_error": None,
+        }
+
+    @classmethod
+    def mode(cls):
+        return "inotify" if awatch else "polling"
+
+    @staticmethod
+    def _signature(paths):
+        # mtimes of every watched file (and of the .json files in watched directories)
+        signature = []
+        for path in paths:
+            if os.path.isdir(path):
+                for name in sorted(os.listdir(path)):
+                    if name.endswith('.json'):
+                        full = os.path.join(path, name)
+                        signature.append((full, os.stat(full).st_mtime_ns))
+            elif os.path.exists(path):
+                signature.append((path, os.stat(path).st_mtime_ns))
+        return tuple(signature)
+
+    @classmethod
+    async def _reload_target(cls, name, force):
+        target = cls._targets[name]
+        started = time.perf_counter()
+        try:
+            changed = await target["reload"](force=force)
+            target["last_error"] = None
+        except Exception as e:
+            changed = False
+            target["last_error"] = str(e)
+            logger.error(f"Hot reload of {name} failed: {e}")
+
+        target["last_duration"] = round(time.perf_counter() - started, 4)
+        if changed:
+            target["reloads"] += 1
+            target["last_reload"] = time.time()
+            logger.info(f"Hot reloaded {name} in {target['last_duration']}s")
+        return changed
+
+    @classmethod
+    async def reload(cls, names=None):
+        # Manual trigger (dashboard): reload the given targets, or all of them
+        names = [n for n in (cls._targets if names is None else names) if n in cls._targets]
+        results = {}
+        for name in names:
+            await cls._reload_target(name, force=True)
+            results[name] = cls.target_status(name)
+        return results
+
+    @classmethod
+    def target_status(cls, name):
+        target = cls._targets[name]
+        return {
+            "reloads": target["reloads"],
+            "lastReload": target["last_reload"],
+            "lastDuration": target["last_duration"],
+            "lastError": target["last_error"],
+        }
+
+    @classmethod
+    def status(cls):
+        return {
+            "mode": cls.mode(),
+            "running": cls._task is not None and not cls._task.done(),
+            "targets": {name: cls.target_status(name) for name in cls._targets},
+        }
+
+    @classmethod
+    async def _poll_loop(cls):
+        for target in cls._targets.values():
+            try:
+                target["signature"] = await asyncio.to_thread(cls._signature, target["paths"])
+            except OSError:
+                # Compared against None, the next readable signature triggers a reload
+                target["signature"] = None
+
+        while True:
+            await asyncio.sleep(Config.CONFIG_POLL_INTERVAL)
+            for name, target in cls._targets.items():
+                if target["poll"]:
+                    await cls._reload_target(name, force=False)
+                    continue
+                if target["watched"]:
+                    continue
+                try:
+                    signature = await asyncio.to_thread(cls._signature, target["paths"])
+                except OSError:
+                    continue
+                if signature != target["signature"]:
+                    target["signature"] = signature
+                    await cls._reload_target(name, force=False)
+
+    @staticmethod
+    def _watch_dir(path):
+        # Editors and atomic_write_json replace files by rename, which drops an
+        # inotify watch on the file itself: watch the directory holding it instead
+        return path if os.path.isdir(path) else os.path.dirname(path)
+
+    @classmethod
+    async def _inotify_loop(cls):
+        watched = set()
+        for target in cls._targets.values():
+            dirs = {cls._watch_dir(p) for p in target["paths"]}
+            # Targets whose directories do not exist yet stay on polling
+            if dirs and all(os.path.isdir(d) for d in dirs):
+                target["watched"] = True
+                watched |= dirs
+        if not watched:
+            return
+        # Watched directories may be the repo root: stay out of .git/, logs/ and
+        # the database files, and only wake up for the registered paths
+        paths = {p for t in cls._targets.values() if t["watched"] for p in t["paths"]}
+        wanted = lambda _, path: os.path.abspath(path) in paths or os.path.dirname(os.path.abspath(path)) in paths
+        async for changes in awatch(*watched, recursive=False, watch_filter=wanted):
+            changed_paths = [os.path.abspath(path) for _, path in changes]
+            for name, target in cls._targets.items():
+                if target["watched"] and any(c == p or c.startswith(p + os.sep) for c in changed_paths for p in target["paths"]):
+                    await cls._reload_target(name, force=False)
+
+    @classmethod
+    async def _run(cls):
+        loops = [cls._poll_loop()]
+        if awatch:
+            loops.append(cls._inotify_loop())
+        await asyncio.gather(*loops)
+
+    @classmethod
+    def start(cls):
+        if cls._task is None:
+            logger.info(f"File watcher started ({cls.mode()}) for: {', '.join(cls._targets)}")
+            cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import aiohttp
+import time
+import urllib.parse
+from collections import Counter, OrderedDict
+from utils.config import Config
+from utils.ttl_cache import TTLCache, STALE
+from utils.single_flight import SingleFlight
+from utils.device_index import DeviceIndex
+from utils.device_store import DeviceStore
+from utils.gsm_models import Device
+from utils.keep_alive_manager import KeepAliveManager
+from utils.resilience import CircuitBreaker, backoff_delay, hedged
+
+logger = logging.getLogger("motionbot")
+
+# Interaction tokens accept followups for 15 minutes after the interaction
+INTERACTION_TOKEN_TTL = 15 * 60
+# Device lookups are counted in memory and added to the store in batches
+LOOKUP_FLUSH_EVERY = 100
+
+class GSMError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or f"API Error: {status}")
+        self.status = status
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status == 429 or self.status >= 500
+
+class GSMTimeout(GSMError):
+    def __init__(self):
+        super().__init__(504, "The GSM API took too long to respond.")
+
+class GSMUnavailable(GSMError):
+    def __init__(self, retry_after):
+        super().__init__(503, f"The GSM API is unavailable, try again in {max(1, round(retry_after))}s.")
+
+class GSMClient:
+    # Access to the GSMArena API (Config.GSM_BASE_URL) with in-memory caches for
+    # search results (by normalized query) and devices (by ID). Expired entries
+    # are still served while a background task refreshes them. Devices are also
+    # kept on disk (DeviceStore), which warms the cache after a restart and is
+    # served, however old, when the API cannot be reached.
+    def __init__(self, http_client):
+        self.http = http_client
+        self.search_cache = TTLCache(Config.GSM_SEARCH_CACHE_SIZE, Config.GSM_SEARCH_TTL, Config.GSM_STALE_TTL)
+        self.device_cache = TTLCache(Config.GSM_DEVICE_CACHE_SIZE, Config.GSM_DEVICE_TTL, Config.GSM_STALE_TTL)
+        self._refreshing = {}  # (kind, key) -> task
+        # Identical lookups in flight at the same time share one upstream request
+        self._flights = SingleFlight()
+        # Names/IDs seen in responses, for autocomplete without upstream calls
+        self.index = DeviceIndex(Config.GSM_INDEX_SIZE)
+        self.store = DeviceStore(Config.GSM_STORE_PATH, Config.GSM_STORE_MAX_MB * 1024 * 1024) if Config.GSM_STORE_PATH else None
+        self.offline_hits = 0
+        # Device lookups (memory hits included) not yet added to the store's counts
+        self._lookups = Counter()
+        self._pending_lookups = 0
+        self._lookup_flush = None
+        # Speculative prefetch of the top search hits (Config.GSM_PREFETCH)
+        self._prefetch_slots = asyncio.Semaphore(Config.GSM_PREFETCH_CONCURRENCY)
+        self._prefetch_tasks = set()
+        self._prefetched = OrderedDict()  # device_id -> None, prefetched and not requested yet
+        self._guild_budgets = {}          # guild_id -> [window_start, used]
+        self._budgets_pruned = time.monotonic()
+        self.prefetch_scheduled = 0
+        self.prefetch_completed = 0
+        self.prefetch_hits = 0
+        self.prefetch_skipped = 0
+        # Upstream resilience: deadlines, retries, circuit breaker, hedging
+        self.breaker = CircuitBreaker(Config.GSM_BREAKER_THRESHOLD, Config.GSM_BREAKER_RESET)
+        self.upstream = {"requests": 0, "failures": 0, "retries": 0, "timeouts": 0, "hedged": 0, "hedgeWins": 0}
+
+    @property
+    def base_url(self):
+        return Config.GSM_BASE_URL
+
+    @staticmethod
+    def normalize_query(query):
+        return ' '.join(query.lower().split())
+
+    @staticmethod
+    def normalize_id(device_id):
+        return device_id.strip()
+
+    @staticmethod
+    def deadline_for(interaction=None):
+        # Wall-clock time an upstream lookup has to finish by: GSM_DEADLINE from
+        # now, and never later than the interaction token can still be answered
+        deadline = time.time() + Config.GSM_DEADLINE
+        if interaction is not None:
+            deadline = min(deadline, interaction.created_at.timestamp() + INTERACTION_TOKEN_TTL - 5)
+        return deadline
+
+    async def _request(self, url):
+        async with self.http.get(url) as resp:
+            if resp.status != 200:
+                raise GSMError(resp.status)
+            return await resp.json()
+
+    async def _attempt(self, url, timeout):
+        call = lambda: asyncio.wait_for(self._request(url), timeout)
+        if Config.GSM_HEDGE_AFTER <= 0 or Config.GSM_HEDGE_AFTER >= timeout:
+            return await call()
+        result, was_hedged, hedge_won = await hedged(call, Config.GSM_HEDGE_AFTER)
+        self.upstream["hedged"] += was_hedged
+        self.upstream["hedgeWins"] += hedge_won
+        return result
+
+    async def _get_json(self, path, deadline=None):
+        deadline = deadline or self.deadline_for()
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            # Fail fast while keep-alive probes say the API is down
+            if KeepAliveManager.is_down():
+                raise GSMUnavailable(KeepAliveManager.retry_after())
+            if not self.breaker.allow():
+                raise GSMUnavailable(self.breaker.retry_after())
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise GSMTimeout()
+
+            self.upstream["requests"] += 1
+            started = time.perf_counter()
+            try:
+                result = await self._attempt(url, min(Config.GSM_REQUEST_TIMEOUT, remaining))
+            except GSMError as e:
+                if not e.retryable:
+                    # The API answered, the request itself was bad
+                    self.breaker.record_success()
+                    KeepAliveManager.record(True, time.perf_counter() - started, e.status)
+                    raise
+                error = e
+            except asyncio.TimeoutError:
+                self.upstream["timeouts"] += 1
+                error = GSMTimeout()
+            except aiohttp.ClientError as e:
+                error = e
+            except ValueError:
+                # Not JSON: the API (or a proxy in front of it) is misbehaving
+                error = GSMError(None, "The GSM API returned an invalid response.")
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                KeepAliveManager.record(True, time.perf_counter() - started, 200)
+                return result
+
+            self.breaker.record_failure()
+            KeepAliveManager.record(False, None, getattr(error, 'status', None))
+            self.upstream["failures"] += 1
+            delay = backoff_delay(attempt, Config.GSM_RETRY_BASE, Config.GSM_RETRY_MAX)
+            if attempt >= Config.GSM_RETRIES or time.time() + delay >= deadline:
+                raise error
+            attempt += 1
+            self.upstream["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def _fetch_search(self, query, deadline=None):
+        return await self._flights.do(('search', query), lambda: self._load_search(query, deadline))
+
+    async def _fetch_device(self, device_id, deadline=None):
+        return await self._flights.do(('device', device_id), lambda: self._load_device(device_id, deadline))
+
+    async def _load_search(self, query, deadline=None):
+        data = await self._get_json(f"/search?q={urllib.parse.quote(query)}", deadline)
+        devices = data if isinstance(data, list) else data.get('data', [])
+        self.search_cache.set(query, devices)
+        self.index.add_devices(devices)
+        return devices
+
+    async def _load_device(self, device_id, deadline=None):
+        payload = await self._get_json(f"/device/{urllib.parse.quote(device_id)}", deadline)
+        # "Not found" answers are not cached, the device may show up later
+        if payload.get('error'):
+            raise GSMError(404, f"Device not found: {payload.get('error')}")
+
+        device = Device.from_payload(device_id, payload)
+        self.device_cache.set(device_id, device)
+        self.index.add(device_id, device.name)
+        if self.store:
+            try:
+                await asyncio.to_thread(self.store.put, device_id, device.to_dict())
+            except Exception as e:
+                logger.warning(f"[GSM] Could not store device '{device_id}': {e}")
+        return device
+
+    async def _load_stored(self, device_id):
+        if not self.store:
+            return None, None
+        try:
+            payload, fetched_at = await asyncio.to_thread(self.store.get, device_id)
+        except Exception as e:
+            logger.warning(f"[GSM] Could not read stored device '{device_id}': {e}")
+            return None, None
+        if payload is None:
+            return None, None
+        return Device.from_payload(device_id, payload), fetched_at
+
+    async def warm(self):
+        # Load the most requested stored devices into memory (and the index)
+        if not self.store:
+            return 0
+        try:
+            entries = await asyncio.to_thread(self.store.popular, self.device_cache.maxsize)
+        except Exception as e:
+            logger.warning(f"[GSM] Could not warm the device cache: {e}")
+            return 0
+
+        now = time.time()
+        max_age = self.device_cache.ttl + self.device_cache.stale_ttl
+        for device_id, payload, fetched_at in reversed(entries):
+            device = Device.from_payload(device_id, payload)
+            self.index.add(device_id, device.name)
+            if now - fetched_at <= max_age:
+                self.device_cache.set(device_id, device, age=now - fetched_at)
+        logger.info(f"[GSM] Warmed device cache with {len(self.device_cache)} stored devices")
+        return len(self.device_cache)
+
+    def _refresh(self, kind, key, fetch):
+        if (kind, key) in self._refreshing:
+            return
+        task = asyncio.create_task(fetch(key))
+        self._refreshing[(kind, key)] = task
+        task.add_done_callback(lambda t: self._refresh_done(kind, key, t))
+
+    def _refresh_done(self, kind, key, task):
+        self._refreshing.pop((kind, key), None)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"[GSM] Background refresh of {kind} '{key}' failed: {task.exception()}")
+
+    def _cached(self, cache, kind, key, fetch):
+        value, state = cache.get(key)
+        if state == STALE:
+            self._refresh(kind, key, fetch)
+        return value
+
+    def cached_search(self, query):
+        # Cached result (fresh or stale) or None, without waiting on the API
+        return self._cached(self.search_cache, 'search', self.normalize_query(query), self._fetch_search)
+
+    def _count_lookup(self, device_id):
+        if not self.store:
+            return
+        self._lookups[device_id] += 1
+        self._pending_lookups += 1
+        if self._pending_lookups >= LOOKUP_FLUSH_EVERY and (self._lookup_flush is None or self._lookup_flush.done()):
+            counts, self._lookups, self._pending_lookups = self._lookups, Counter(), 0
+            self._lookup_flush = asyncio.create_task(self._flush_lookups(counts))
+
+    async def _flush_lookups(self, counts):
+        try:
+            await asyncio.to_thread(self.store.add_lookups, counts)
+        except Exception as e:
+            logger.warning(f"[GSM] Could not store device lookup counts: {e}")
+
+    def cached_device(self, device_id):
+        device_id = self.normalize_id(device_id)
+        self._count_lookup(device_id)
+        if device_id in self._prefetched:
+            del self._prefetched[device_id]
+            self.prefetch_hits += 1
+        return self._cached(self.device_cache, 'device', self.normalize_id(device_id), self._fetch_device)
+
+    def _take_budget(self, guild_id):
+        now = time.monotonic()
+        if now - self._budgets_pruned >= 3600:
+            # Drop the windows that ran out, or every guild ever seen stays here
+            self._budgets_pruned = now
+            self._guild_budgets = {g: b for g, b in self._guild_budgets.items() if now - b[0] < 3600}
+        budget = self._guild_budgets.get(guild_id)
+        if budget is None or now - budget[0] >= 3600:
+            budget = self._guild_budgets[guild_id] = [now, 0]
+        if budget[1] >= Config.GSM_PREFETCH_GUILD_BUDGET:
+            return False
+        budget[1] += 1
+        return True
+
+    def prefetch(self, devices, guild_id=None):
+        # Fetch the details of the first search hits in the background, since a
+        # /gsm specs on one of them usually follows. Bounded by a concurrency cap
+        # and an hourly per-guild budget.
+        if not Config.GSM_PREFETCH:
+            return
+        for device in devices[:Config.GSM_PREFETCH_COUNT]:
+            device_id = device.get('id') or device.get('slug')
+            if not device_id or device_id in self.device_cache or self._flights.in_flight(('device', device_id)):
+                continue
+            if not self._take_budget(guild_id):
+                self.prefetch_skipped += 1
+                continue
+            self.prefetch_scheduled += 1
+            task = asyncio.create_task(self._prefetch_one(device_id))
+            self._prefetch_tasks.add(task)
+            task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _prefetch_one(self, device_id):
+        async with self._prefetch_slots:
+            if device_id in self.device_cache:
+                return
+            try:
+                stored, fetched_at = await self._load_stored(device_id)
+                if stored is not None and time.time() - fetched_at <= self.device_cache.ttl:
+                    self.device_cache.set(device_id, stored, age=time.time() - fetched_at)
+                else:
+                    await self._fetch_device(device_id)
+            except Exception as e:
+                logger.debug(f"[GSM] Prefetch of '{device_id}' failed: {e}")
+                return
+        self.prefetch_completed += 1
+        self._prefetched[device_id] = None
+        while len(self._prefetched) > self.device_cache.maxsize:
+            self._prefetched.popitem(last=False)
+
+    # check_cache=False: the caller already got a miss from cached_search/cached_device
+    async def search(self, query, deadline=None, check_cache=True):
+        devices = self.cached_search(query) if check_cache else None
+        if devices is None:
+            devices = await self._fetch_search(self.normalize_query(query), deadline)
+        return devices
+
+    async def device(self, device_id, deadline=None, check_cache=True):
+        device_id = self.normalize_id(device_id)
+        device = self.cached_device(device_id) if check_cache else None
+        if device is not None:
+            return device
+
+        stored, fetched_at = await self._load_stored(device_id)
+        if stored is not None:
+            age = time.time() - fetched_at
+            if age <= self.device_cache.ttl + self.device_cache.stale_ttl:
+                self.device_cache.set(device_id, stored, age=age)
+                if age > self.device_cache.ttl:
+                    self._refresh('device', device_id, self._fetch_device)
+                return stored
+
+        try:
+            return await self._fetch_device(device_id, deadline)
+        except (GSMError, asyncio.TimeoutError, aiohttp.ClientError) as e:
+            # A definite answer (e.g. not found) is passed on; only an unreachable
+            # or failing API falls back to the stored copy
+            if stored is None or (isinstance(e, GSMError) and not e.retryable):
+                raise
+            # Offline mode: an old copy beats no answer
+            self.offline_hits += 1
+            logger.warning(f"[GSM] {e}; serving stored '{device_id}' from {int(age)}s ago")
+            return stored
+
+    def stats(self):
+        return {
+            "search": self.search_cache.stats(),
+            "device": self.device_cache.stats(),
+            "refreshing": len(self._refreshing),
+            "coalescing": self._flights.stats(),
+            "index": self.index.stats(),
+            "store": self.store.stats() if self.store else None,
+            "offlineHits": self.offline_hits,
+            "prefetch": {
+                "enabled": Config.GSM_PREFETCH,
+                "scheduled": self.prefetch_scheduled,
+                "prefetched": self.prefetch_completed,
+                "hits": self.prefetch_hits,
+                "skippedByBudget": self.prefetch_skipped,
+                "hitRatio": round(self.prefetch_hits / self.prefetch_completed, 4) if self.prefetch_completed else None,
+            },
+        }
+
+    def upstream_status(self):
+        return {
+            "baseUrl": self.base_url,
+            "breaker": self.breaker.status(),
+            "health": KeepAliveManager.health(),
+            **self.upstream,
+            "settings": {
+                "requestTimeout": Config.GSM_REQUEST_TIMEOUT,
+                "deadline": Config.GSM_DEADLINE,
+                "retries": Config.GSM_RETRIES,
+                "hedgeAfter": Config.GSM_HEDGE_AFTER,
+            },
+        }
+
+    async def close(self):
+        for task in list(self._prefetch_tasks):
+            task.cancel()
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+        self._flights.cancel_all()
+        if self.store:
+            if self._lookup_flush:
+                await self._lookup_flush
+            if self._lookups:
+                await self._flush_lookups(self._lookups)
+                self._lookups = Counter()
+            self.store.close()
@@ -0,0 +1,95 @@
+import discord
+from utils.theme_manager import ThemeManager
+
+class Device:
+    # Compact, normalized form of a GSM API device payload. Built once per fetch:
+    # the name/title, img/image, quick_spec/quickSpec and detail_spec/detailSpec
+    # variants are resolved here, and every category is pre-rendered to its embed
+    # text. Embeds are built lazily and cached per theme version; treat them as
+    # read-only.
+    __slots__ = ('id', 'name', 'image', 'quick', 'categories', 'sections', '_embeds', '_theme_version')
+
+    def __init__(self, device_id, name, image, quick, sections):
+        self.id = device_id
+        self.name = name
+        self.image = image
+        self.quick = quick            # ((name, value), ...)
+        self.sections = sections      # {category: rendered text}
+        self.categories = tuple(sections)
+        self._embeds = {}
+        self._theme_version = None
+
+    @classmethod
+    def from_payload(cls, device_id, payload):
+        # Accepts a raw API payload or the output of to_dict()
+        if 'sections' in payload:
+            return cls(
+                device_id,
+                payload['name'],
+                payload.get('image'),
+                tuple(tuple(q) for q in payload.get('quick', ())),
+                dict(payload['sections'])
+            )
+
+        quick = payload.get('quick_spec') or payload.get('quickSpec')
+        if quick and isinstance(quick, list):
+            quick = tuple((q.get('name', 'Info'), q.get('value', 'N/A')) for q in quick)
+        else:
+            quick = ()
+
+        sections = {}
+        for category in payload.get('detail_spec') or payload.get('detailSpec') or []:
+            name = category.get('category')
+            if name and name not in sections:
+                lines = [f"**{s.get('name')}**: {s.get('value')}\n" for s in category.get('specifications', [])]
+                sections[name] = ''.join(lines)[:4096]
+
+        return cls(
+            device_id,
+            payload.get('name') or payload.get('title') or "Specs",
+            payload.get('img') or payload.get('image'),
+            quick,
+            sections
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "image": self.image,
+            "quick": [list(q) for q in self.quick],
+            "sections": [[category, text] for category, text in self.sections.items()],
+        }
+
+    def _cached_embed(self, key, build):
+        version = ThemeManager.get().version
+        if version != self._theme_version:
+            self._embeds = {}
+            self._theme_version = version
+        embed = self._embeds.get(key)
+        if embed is None:
+            embed = self._embeds[key] = build()
+        return embed
+
+    def home_embed(self):
+        return self._cached_embed(None, self._build_home_embed)
+
+    def category_embed(self, category):
+        return self._cached_embed(category, lambda: self._build_category_embed(category))
+
+    def _build_home_embed(self):
+        embed = discord.Embed(title=self.name, color=ThemeManager.get().accent)
+        embed.set_thumbnail(url=self.image)
+        if self.quick:
+            for name, value in self.quick:
+                embed.add_field(name=name, value=value, inline=True)
+        else:
+            embed.description = "No quick specs available."
+        return embed
+
+    def _build_category_embed(self, category):
+        embed = discord.Embed(title=f"{self.name} - {category}", color=ThemeManager.get().accent)
+        embed.set_thumbnail(url=self.image)
+        text = self.sections.get(category)
+        embed.description = text if text is not None else "No data."
+        return embed
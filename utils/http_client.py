@@ -0,0 +1,37 @@
+import aiohttp
+from utils.config import Config
+
+class HttpClient:
+    # One pooled aiohttp session for the whole bot: kept-alive connections with
+    # per-host limits and cached DNS, so requests skip the TCP/TLS handshake.
+    # Owned by the bot (created lazily inside the running loop, closed on shutdown)
+    # and handed to the cogs/managers that make outbound requests.
+    def __init__(self, limit=None, limit_per_host=None, dns_ttl=None, timeout=None, connect_timeout=None):
+        self.limit = limit or Config.HTTP_POOL_LIMIT
+        self.limit_per_host = limit_per_host or Config.HTTP_POOL_LIMIT_PER_HOST
+        self.dns_ttl = dns_ttl or Config.HTTP_DNS_TTL
+        self.timeout = aiohttp.ClientTimeout(
+            total=timeout or Config.HTTP_TIMEOUT,
+            connect=connect_timeout or Config.HTTP_CONNECT_TIMEOUT
+        )
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                use_dns_cache=True
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -1,23 +1,48 @@
 import asyncio
-import aiohttp
 import logging
+import statistics
+import time
+from collections import deque
+import aiohttp
 from utils.config import Config
 
 logger = logging.getLogger("motionbot")
 
 class KeepAliveManager:
+    # Keeps the GSM API host warm and tracks its health. Probes and real /gsm
+    # traffic (reported by GSMClient through `record`) land in a rolling window.
+    # Probes are skipped, with a growing interval, while real traffic keeps the
+    # host warm, and come faster after a failure until the API answers again.
+    # Only failed probes mark the API as down: a burst of failing (and retried)
+    # requests just wakes the probe early.
     _task = None
+    _http = None
+    _window = deque(maxlen=Config.KEEP_ALIVE_WINDOW)  # (time, ok, latency, status, source)
+    _interval = Config.KEEP_ALIVE_INTERVAL
+    _consecutive_failures = 0
+    _probe_failures = 0   # consecutive failed probes, what is_down() trusts
+    _last_probe = None    # monotonic time of the last probe
+    _wake = None          # set to probe before the interval is over
+    _last_success = None
+    _last_failure = None
+    _last_traffic = None  # monotonic time of the last successful real request
+    _probes = 0
+    _skipped = 0
 
     @classmethod
-    async def start(cls):
+    async def start(cls, http_client=None):
+        if http_client is not None:
+            cls._http = http_client
         if cls._task:
             return
 
         enabled = Config.GSM_KEEP_ALIVE
         url = Config.GSM_BASE_URL
 
-        if enabled and url:
-            logger.info(f"GSMArena Keep-Alive enabled. Pinging every 15s to {url}")
+        if enabled and url and cls._http:
+            cls._interval = Config.KEEP_ALIVE_INTERVAL
+            cls._wake = asyncio.Event()
+            logger.info(f"GSMArena Keep-Alive enabled. Pinging {url} every {cls._interval}s (adaptive)")
             cls._task = asyncio.create_task(cls._run(url))
         else:
             logger.info("GSMArena Keep-Alive disabled.")
@@ -37,15 +62,117 @@ class KeepAliveManager:
         await cls.stop()
         await cls.start()
 
+    @classmethod
+    def record(cls, ok, latency=None, status=None, source='traffic'):
+        now = time.time()
+        cls._window.append((now, ok, latency, status, source))
+        if ok:
+            cls._consecutive_failures = 0
+            cls._probe_failures = 0
+            cls._last_success = now
+            if source == 'traffic':
+                cls._last_traffic = time.monotonic()
+        else:
+            cls._consecutive_failures += 1
+            cls._last_failure = now
+            if source == 'probe':
+                cls._probe_failures += 1
+            elif cls.is_running():
+                # Check the API now instead of at the end of a (possibly backed-off) interval
+                cls._interval = min(cls._interval, Config.KEEP_ALIVE_FAST_INTERVAL)
+                if cls._last_probe is None or time.monotonic() - cls._last_probe >= Config.KEEP_ALIVE_FAST_INTERVAL:
+                    cls._wake.set()
+
+    @classmethod
+    def is_running(cls):
+        return cls._task is not None and not cls._task.done()
+
+    @classmethod
+    def is_down(cls):
+        # Only trusted while probing, which is what notices the API coming back
+        return cls.is_running() and cls._probe_failures >= Config.KEEP_ALIVE_DOWN_AFTER
+
+    @classmethod
+    def retry_after(cls):
+        return cls._interval if cls.is_down() else 0
+
+    @classmethod
+    def health(cls):
+        samples = list(cls._window)
+        successes = [s for s in samples if s[1]]
+        latencies = [s[2] for s in successes if s[2] is not None]
+        success_rate = len(successes) / len(samples) if samples else None
+
+        if not samples:
+            status = "unknown"
+        elif cls._probe_failures >= Config.KEEP_ALIVE_DOWN_AFTER:
+            status = "down"
+        elif cls._consecutive_failures or success_rate < 0.8:
+            status = "degraded"
+        else:
+            status = "healthy"
+
+        return {
+            "status": status,
+            "probing": cls.is_running(),
+            "interval": cls._interval,
+            "samples": len(samples),
+            "successRate": round(success_rate, 4) if success_rate is not None else None,
+            "latencyP50": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+            "latencyMax": round(max(latencies) * 1000, 1) if latencies else None,
+            "consecutiveFailures": cls._consecutive_failures,
+            "probeFailures": cls._probe_failures,
+            "lastSuccess": cls._last_success,
+            "lastFailure": cls._last_failure,
+            "probes": cls._probes,
+            "skipped": cls._skipped,
+            "recent": [
+                {"time": t, "ok": ok, "latency": round(latency * 1000, 1) if latency is not None else None, "status": status_code, "source": source}
+                for t, ok, latency, status_code, source in samples[-10:]
+            ],
+        }
+
+    @classmethod
+    async def _probe(cls, url):
+        cls._probes += 1
+        cls._last_probe = time.monotonic()
+        started = time.perf_counter()
+        try:
+            async with cls._http.get(url, timeout=aiohttp.ClientTimeout(total=Config.KEEP_ALIVE_TIMEOUT)) as resp:
+                ok = resp.status < 500
+                cls.record(ok, time.perf_counter() - started, resp.status, 'probe')
+        except Exception as e:
+            ok = False
+            cls.record(False, None, None, 'probe')
+            if cls._probe_failures == 1:
+                logger.warning(f"[KeepAlive] Ping failed to {url}: {e}")
+        return ok
+
+    @classmethod
+    def _next_interval(cls, ok):
+        if not ok:
+            # Probe faster after a failure, easing back towards the normal interval
+            return min(Config.KEEP_ALIVE_INTERVAL, Config.KEEP_ALIVE_FAST_INTERVAL * 2 ** (cls._probe_failures - 1))
+        return Config.KEEP_ALIVE_INTERVAL
+
     @classmethod
     async def _run(cls, url):
         while True:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as resp:
-                        # Success is silent to avoid log spam
-                        pass
-            except Exception as e:
-                logger.warning(f"[KeepAlive] Ping failed to {url}: {e}")
-            
-            await asyncio.sleep(15)
+                await asyncio.wait_for(cls._wake.wait(), cls._interval)
+            except asyncio.TimeoutError:
+                pass
+            cls._wake.clear()
+
+            traffic_age = time.monotonic() - cls._last_traffic if cls._last_traffic else None
+            if not cls._consecutive_failures and traffic_age is not None and traffic_age < cls._interval:
+                # Real requests keep the host warm: skip and back off
+                cls._skipped += 1
+                cls._interval = min(Config.KEEP_ALIVE_MAX_INTERVAL, cls._interval * 2)
+                continue
+
+            was_down = cls._probe_failures >= Config.KEEP_ALIVE_DOWN_AFTER
+            ok = await cls._probe(url)
+            if ok and was_down:
+                logger.info(f"[KeepAlive] {url} is reachable again")
+            cls._interval = cls._next_interval(ok)
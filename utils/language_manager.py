@@ -1,97 +1,263 @@
+import asyncio
 import json
 import os
+import string
+from collections import OrderedDict
+import discord
+from utils.config import Config
+from utils.storage import get_backend
 
 LANG_DIR = 'languages'
 CUSTOM_STRINGS_PATH = 'custom/strings.json'
-LANGUAGE_SETTINGS_PATH = 'settings/language.json'
 DEFAULT_LANG = 'en'
 
+_formatter = string.Formatter()
+
+class Template:
+    # A translation string with its format fields parsed once. `fields` holds the
+    # keyword names it needs; strings that need none are pre-rendered into `static`.
+    __slots__ = ('text', 'fields', 'static')
+
+    def __init__(self, text):
+        self.text = text
+        try:
+            fields = set()
+            for _, field, _, _ in _formatter.parse(text):
+                if field is None:
+                    continue
+                name = field.split('.', 1)[0].split('[', 1)[0]
+                if not name or name.isdigit():
+                    # Positional fields can never be filled from kwargs
+                    raise ValueError(field)
+                fields.add(name)
+            self.fields = frozenset(fields)
+            self.static = None if fields else text.format()
+        except ValueError:
+            # Unbalanced braces or positional fields: always used verbatim
+            self.fields = frozenset()
+            self.static = text
+
+    def render(self, kwargs):
+        if self.static is not None:
+            return self.static
+        # Missing kwargs keep the raw text, as before
+        if not self.fields <= kwargs.keys():
+            return self.text
+        try:
+            return self.text.format(**kwargs)
+        except (ValueError, TypeError, AttributeError, IndexError, KeyError):
+            return self.text
+
 class LanguageManager:
     _current_lang = DEFAULT_LANG
-    _cache = {}
+    _default_strings = {}
     _custom_strings = {}
+    # Flattened {key: Template} for the current language, with the
+    # custom -> current language -> default precedence already resolved
+    _catalog = {}
+    # Other languages, compiled on first use and kept in a size-bounded LRU
+    _catalogs = OrderedDict()
+    # Per-guild language overrides and the resolved {locale: lang_code or None}
+    _guild_langs = {}
+    _available = None
+    _locale_map = {}
 
     @classmethod
-    def load_settings(cls):
-        # Load current language from settings
-        if os.path.exists(LANGUAGE_SETTINGS_PATH):
-            try:
-                with open(LANGUAGE_SETTINGS_PATH, 'r') as f:
-                    data = json.load(f)
-                    cls._current_lang = data.get('language', DEFAULT_LANG)
-            except:
-                pass
-        
-        # Load custom strings
+    def _load_state(cls):
+        # Reads settings, strings and the current catalog without touching class
+        # state, so it can run off the event loop. A file that fails to load
+        # (e.g. a half-saved edit) keeps its previous contents.
+        current_lang = cls._current_lang
+        guild_langs = cls._guild_langs
+        try:
+            backend = get_backend()
+            current_lang = backend.load_language() or DEFAULT_LANG
+            guild_langs = backend.load_guild_languages()
+        except:
+            pass
+
+        custom_strings = cls._custom_strings
         if os.path.exists(CUSTOM_STRINGS_PATH):
             try:
                 with open(CUSTOM_STRINGS_PATH, 'r', encoding='utf-8') as f:
-                    cls._custom_strings = json.load(f)
+                    custom_strings = json.load(f)
             except:
                 pass
 
+        default_strings = cls.read_language(DEFAULT_LANG) or cls._default_strings
+        lang_strings = cls.read_language(current_lang) if current_lang != DEFAULT_LANG else {}
+        return {
+            "current_lang": current_lang,
+            "guild_langs": guild_langs,
+            "custom_strings": custom_strings,
+            "default_strings": default_strings,
+            "catalog": cls._build(default_strings, lang_strings, custom_strings)
+        }
+
+    @classmethod
+    def _apply_state(cls, state):
+        # Swap everything in at once, from the event loop
+        cls._current_lang = state["current_lang"]
+        cls._guild_langs = state["guild_langs"]
+        cls._custom_strings = state["custom_strings"]
+        cls._default_strings = state["default_strings"]
+        cls._catalog = state["catalog"]
+        cls._catalogs.clear()
+        cls._available = None
+        cls._locale_map = {}
+
+    @classmethod
+    def load_settings(cls):
+        cls._apply_state(cls._load_state())
+
+    @classmethod
+    async def reload(cls, force=False):
+        cls._apply_state(await asyncio.to_thread(cls._load_state))
+        return True
+
     @classmethod
     def save_settings(cls):
-        os.makedirs(os.path.dirname(LANGUAGE_SETTINGS_PATH), exist_ok=True)
         try:
-            with open(LANGUAGE_SETTINGS_PATH, 'w') as f:
-                json.dump({'language': cls._current_lang}, f, indent=4)
+            get_backend().save_language(cls._current_lang)
         except:
             pass
 
-    @classmethod
-    def load_language(cls, lang_code):
-        if lang_code in cls._cache:
-            return cls._cache[lang_code]
-        
+    @staticmethod
+    def read_language(lang_code):
         file_path = os.path.join(LANG_DIR, f'{lang_code}.json')
         if not os.path.exists(file_path):
             return {}
-            
+
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                cls._cache[lang_code] = data
-                return data
+                return json.load(f)
         except Exception:
             return {}
-            
-    @classmethod
-    def t(cls, key, **kwargs):
-        # 1. Custom string override
-        text = cls._custom_strings.get(key)
-        
-        # 2. Try current language
-        if not text:
-            lang_data = cls.load_language(cls._current_lang)
-            text = lang_data.get(key)
-        
-        # 3. Fallback to default if missing
-        if not text and cls._current_lang != DEFAULT_LANG:
-            default_data = cls.load_language(DEFAULT_LANG)
-            text = default_data.get(key)
-            
-        if not text:
+
+    @classmethod
+    def load_language(cls, lang_code):
+        # The default language stays in memory; it is a layer of every catalog
+        if lang_code == DEFAULT_LANG and cls._default_strings:
+            return cls._default_strings
+        return cls.read_language(lang_code)
+
+    @staticmethod
+    def _build(default_strings, lang_strings, custom_strings):
+        merged = {}
+        # Later layers win; empty values fall through to the layer below
+        for layer in (default_strings, lang_strings, custom_strings):
+            for key, text in layer.items():
+                if text and isinstance(text, str):
+                    merged[key] = text
+        return {key: Template(text) for key, text in merged.items()}
+
+    @classmethod
+    def build_catalog(cls, lang_code):
+        lang_strings = cls.read_language(lang_code) if lang_code != DEFAULT_LANG else {}
+        return cls._build(cls.load_language(DEFAULT_LANG), lang_strings, cls._custom_strings)
+
+    @classmethod
+    def compile(cls):
+        cls._catalog = cls.build_catalog(cls._current_lang)
+        cls._catalogs.clear()
+        cls._available = None
+        cls._locale_map = {}
+
+    @classmethod
+    def get_catalog(cls, lang_code):
+        if lang_code == cls._current_lang:
+            return cls._catalog
+
+        catalog = cls._catalogs.get(lang_code)
+        if catalog is not None:
+            cls._catalogs.move_to_end(lang_code)
+            return catalog
+
+        catalog = cls.build_catalog(lang_code)
+        cls._catalogs[lang_code] = catalog
+        while len(cls._catalogs) > Config.LANGUAGE_CACHE_SIZE:
+            cls._catalogs.popitem(last=False)
+        return catalog
+
+    @classmethod
+    def match_locale(cls, locale):
+        # Map a Discord locale ('pt-BR', 'en-US', Locale.french) to an available
+        # language file, or None. Results (including misses) are memoized.
+        locale = str(getattr(locale, 'value', locale))
+        if locale in cls._locale_map:
+            return cls._locale_map[locale]
+
+        if cls._available is None:
+            cls._available = set(cls.get_available_languages())
+
+        match = None
+        for candidate in (locale, locale.replace('-', '_'), locale.lower(), locale.split('-')[0].lower()):
+            if candidate in cls._available:
+                match = candidate
+                break
+        cls._locale_map[locale] = match
+        return match
+
+    @classmethod
+    def resolve_language(cls, ctx=None):
+        # ctx: an Interaction, a Guild, a locale, or None for the bot-wide language
+        if ctx is None:
+            return cls._current_lang
+
+        if isinstance(ctx, discord.Interaction):
+            guild_lang = cls._guild_langs.get(str(ctx.guild_id)) if ctx.guild_id else None
+            return guild_lang or cls.match_locale(ctx.locale) or cls._current_lang
+
+        if isinstance(ctx, discord.Guild):
+            return cls._guild_langs.get(str(ctx.id)) or cls._current_lang
+
+        return cls.match_locale(ctx) or cls._current_lang
+
+    @classmethod
+    def t(cls, key, ctx=None, **kwargs):
+        catalog = cls._catalog if ctx is None else cls.get_catalog(cls.resolve_language(ctx))
+        entry = catalog.get(key)
+        if entry is None:
             return key
-            
-        # Format string
-        try:
-            return text.format(**kwargs)
-        except:
-            return text
+        return entry.render(kwargs)
+
+    @classmethod
+    def has(cls, key, ctx=None):
+        catalog = cls._catalog if ctx is None else cls.get_catalog(cls.resolve_language(ctx))
+        return key in catalog
 
     @classmethod
     def set_language(cls, lang_code):
         if os.path.exists(os.path.join(LANG_DIR, f'{lang_code}.json')):
             cls._current_lang = lang_code
             cls.save_settings()
+            cls.compile()
             return True
         return False
 
     @classmethod
-    def get_language(cls):
+    def get_language(cls, guild_id=None):
+        if guild_id:
+            return cls._guild_langs.get(str(guild_id), cls._current_lang)
         return cls._current_lang
 
+    @classmethod
+    def set_guild_language(cls, guild_id, lang_code):
+        # lang_code None/empty makes the guild follow the bot-wide language again
+        if lang_code and not os.path.exists(os.path.join(LANG_DIR, f'{lang_code}.json')):
+            return False
+        try:
+            get_backend().save_guild_language(guild_id, lang_code or None)
+        except Exception as e:
+            print(f"Error saving guild language: {e}")
+            return False
+
+        if lang_code:
+            cls._guild_langs[str(guild_id)] = lang_code
+        else:
+            cls._guild_langs.pop(str(guild_id), None)
+        return True
+
     @classmethod
     def get_available_languages(cls):
         if not os.path.exists(LANG_DIR):
@@ -99,5 +265,40 @@ class LanguageManager:
         files = [f[:-5] for f in os.listdir(LANG_DIR) if f.endswith('.json')]
         return files
 
+    @classmethod
+    def validate(cls):
+        # Compare every language file and the custom strings against the default
+        # language: keys missing or unknown, and placeholders that differ.
+        def fields_of(data):
+            return {
+                key: sorted(Template(text).fields)
+                for key, text in data.items()
+                if isinstance(text, str) and not key.startswith('_')
+            }
+
+        reference = fields_of(cls.load_language(DEFAULT_LANG))
+
+        def compare(data):
+            fields = fields_of(data)
+            return {
+                "missing": sorted(k for k in reference if k not in fields),
+                "unknown": sorted(k for k in fields if k not in reference),
+                "placeholders": {
+                    k: {"expected": reference[k], "found": fields[k]}
+                    for k in fields
+                    if k in reference and fields[k] != reference[k]
+                }
+            }
+
+        report = {"default": DEFAULT_LANG, "languages": {}, "custom": None}
+        for lang_code in sorted(cls.get_available_languages()):
+            if lang_code != DEFAULT_LANG:
+                report["languages"][lang_code] = compare(cls.load_language(lang_code))
+
+        custom = compare(cls._custom_strings)
+        del custom["missing"]  # overrides are optional by design
+        report["custom"] = custom
+        return report
+
 # Initialize on import
 LanguageManager.load_settings()
@@ -0,0 +1,310 @@
+import datetime
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from utils.config import Config
+
+try:
+    import zstandard
+except ImportError:  # Optional: gzip is used instead
+    zstandard = None
+
+logger = logging.getLogger("motionbot")
+
+ARCHIVE_DIR = "archive"
+INDEX_FILE = "index.jsonl"
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+ENTRY_SEPARATOR = '-' * 80
+
+def compression_suffix():
+    if Config.LOG_COMPRESSION == 'zstd' and zstandard:
+        return '.zst'
+    if Config.LOG_COMPRESSION == 'none':
+        return None
+    return '.gz'
+
+def compress_file(path):
+    # Replaces `path` by its compressed copy; returns the new path (or `path`
+    # when it is left as is)
+    suffix = compression_suffix()
+    if suffix is None or not os.path.exists(path):
+        return path
+    target = path + suffix
+    if os.path.exists(target):
+        # Never overwrite an archive: the index may point into it
+        logger.warning(f"[Logs] Not compressing {path}: {target} already exists")
+        return path
+    tmp = target + '.tmp'
+    stat = os.stat(path)
+    with open(path, 'rb') as src:
+        if suffix == '.zst':
+            with open(tmp, 'wb') as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+        else:
+            with gzip.open(tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+    # Keep the original mtime: retention goes by it
+    os.utime(tmp, (stat.st_atime, stat.st_mtime))
+    os.replace(tmp, target)
+    os.remove(path)
+    return target
+
+def exists(path):
+    # Whether `path` or a compressed copy of it exists
+    return resolve(path) is not None
+
+def resolve(path):
+    # A log file may have been compressed since it was indexed. A compressed
+    # copy wins: next to a plain file of the same name it is either identical
+    # (compression in progress) or the original the index points into.
+    for candidate in tuple(path + suffix for suffix in COMPRESSED_SUFFIXES) + (path,):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def open_log(path):
+    # Binary stream of the uncompressed contents; compressed ones seek forward only
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        if not zstandard:
+            raise RuntimeError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+class LogIndex:
+    # Compact index of the command errors written to logs/ (time, command,
+    # fingerprint, message, file, offset) kept in memory and appended to
+    # logs/index.jsonl, so the dashboard can search recent errors and open one
+    # without scanning the log files.
+    def __init__(self, logs_dir, max_entries):
+        self.path = os.path.join(logs_dir, INDEX_FILE)
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._stream = None
+        self._file_lines = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with self._lock, open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self._entries.append(json.loads(line))
+                    self._file_lines += 1
+                except ValueError:
+                    continue
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+            if self._stream is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._stream = open(self.path, 'a', encoding='utf-8')
+            self._stream.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file_lines += 1
+            # Entries older than the window are only dead weight in the file
+            if self._file_lines > self._entries.maxlen * 2:
+                self._rewrite(list(self._entries))
+
+    def flush(self):
+        with self._lock:
+            if self._stream:
+                self._stream.flush()
+
+    def compact(self):
+        # Drop entries whose log file is gone and rewrite the file when it holds
+        # noticeably more lines than the in-memory window
+        with self._lock:
+            kept = [e for e in self._entries if resolve(e["file"])]
+            if len(kept) == len(self._entries) and self._file_lines <= len(self._entries) * 2:
+                return
+            self._rewrite(kept)
+
+    def _rewrite(self, kept):
+        # Caller holds the lock
+        self._entries.clear()
+        self._entries.extend(kept)
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in kept:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp, self.path)
+        self._file_lines = len(kept)
+
+    def search(self, text=None, command=None, fingerprint=None, since=None, limit=50):
+        text = text.lower() if text else None
+        results = []
+        with self._lock:
+            entries = list(self._entries)
+        for entry in reversed(entries):
+            if since and entry["time"] < since:
+                break
+            if command and entry.get("command") != command:
+                continue
+            if fingerprint and entry.get("fingerprint") != fingerprint:
+                continue
+            if text and not any(text in str(entry.get(key) or '').lower() for key in ("message", "command", "fingerprint", "type")):
+                continue
+            results.append(entry)
+            if len(results) >= limit:
+                break
+        return results
+
+    def close(self):
+        with self._lock:
+            if self._stream:
+                self._stream.close()
+            self._stream = None
+
+    def __len__(self):
+        return len(self._entries)
+
+def read_entry(file, offset, max_bytes=65536):
+    # Full text of the log entry starting at `offset` of `file` (as indexed)
+    path = resolve(file)
+    if path is None:
+        return None
+    with open_log(path) as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    if lines and lines[0].startswith('{'):
+        return lines[0]  # JSON format: one entry per line
+    entry = []
+    for line in lines:
+        entry.append(line)
+        if line.strip() == ENTRY_SEPARATOR:
+            break
+    return ''.join(entry)
+
+class LogArchiver:
+    # Background thread that compresses closed log files (rotated bot.log parts
+    # and past hourly error files) and applies the retention policy: files older
+    # than LOG_RETENTION_DAYS go first, then the oldest ones until logs/ fits
+    # in LOG_MAX_TOTAL_MB.
+    def __init__(self, logs_dir, index=None):
+        self.logs_dir = logs_dir
+        self.index = index
+        self._queue = queue.Queue()
+        self._thread = None
+        self.compressed = 0
+        self.deleted = 0
+        self.last_sweep = None
+        # Size of logs/ as of the last sweep, so stats() does not walk the tree
+        self.files = 0
+        self.bytes = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-archiver", daemon=True)
+            self._thread.start()
+            self._queue.put(('sweep', None))
+
+    def submit(self, path):
+        self._queue.put(('compress', path))
+
+    def sweep(self):
+        self._queue.put(('sweep', None))
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(('stop', None))
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                action, path = self._queue.get(timeout=3600)
+            except queue.Empty:
+                action, path = 'sweep', None
+            try:
+                if action == 'stop':
+                    return
+                if action == 'compress':
+                    if compress_file(path) != path:
+                        self.compressed += 1
+                else:
+                    self._sweep()
+            except Exception as e:
+                logger.warning(f"[Logs] {action} failed for {path or self.logs_dir}: {e}")
+
+    def _files(self):
+        files = []
+        for root, _, names in os.walk(self.logs_dir):
+            for name in names:
+                if name.endswith('.log') or name.endswith(COMPRESSED_SUFFIXES):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        return sorted(files)
+
+    def _sweep(self):
+        if not os.path.isdir(self.logs_dir):
+            return
+        now = datetime.datetime.now()
+        current_hour = now.strftime("%H-00")
+        today = os.path.join(self.logs_dir, now.strftime("%Y-%m-%d"))
+
+        # Leftovers of earlier runs: past hourly files and rotated parts
+        for _, _, path in self._files():
+            if not path.endswith('.log'):
+                continue
+            if os.path.dirname(path) == today and os.path.basename(path).startswith(current_hour):
+                continue
+            if os.path.getmtime(path) > time.time() - 300:
+                continue  # may still receive a late record
+            if compress_file(path) != path:
+                self.compressed += 1
+
+        files = self._files()
+        cutoff = time.time() - Config.LOG_RETENTION_DAYS * 86400
+        budget = Config.LOG_MAX_TOTAL_MB * 1024 * 1024
+        total = sum(size for _, size, _ in files)
+        count = len(files)
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= budget:
+                break
+            if os.path.dirname(path) == today and os.path.basename(path).startswith(current_hour):
+                continue
+            os.remove(path)
+            total -= size
+            count -= 1
+            self.deleted += 1
+
+        # Remove emptied date directories
+        for name in os.listdir(self.logs_dir):
+            path = os.path.join(self.logs_dir, name)
+            if os.path.isdir(path) and not os.listdir(path):
+                os.rmdir(path)
+
+        if self.index is not None:
+            self.index.compact()
+        self.files = count
+        self.bytes = total
+        self.last_sweep = time.time()
+
+    def stats(self):
+        return {
+            "compression": compression_suffix() or "none",
+            "retentionDays": Config.LOG_RETENTION_DAYS,
+            "maxTotalMb": Config.LOG_MAX_TOTAL_MB,
+            "files": self.files,
+            "bytes": self.bytes,
+            "compressed": self.compressed,
+            "deleted": self.deleted,
+            "lastSweep": self.last_sweep,
+        }
@@ -1,29 +1,378 @@
 import os
+import copy
+import json
+import queue
+import atexit
+import logging
 import datetime
+import threading
 import traceback
+import logging.handlers
+from utils.config import Config
+from utils.log_archive import ARCHIVE_DIR, COMPRESSED_SUFFIXES, LogArchiver, LogIndex, exists
 
-def log_error(error, command_name):
+LOGS_DIR = "logs"
+BOT_LOG_PATH = "bot.log"
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+# Command errors (log_error) go through this logger to logs/<date>/<hour>.log
+error_logger = logging.getLogger("motionbot.errors")
+error_logger.propagate = False
+
+_handler = None
+_listener = None
+_archiver = None
+_index = None
+
+def error_log_path(when):
+    return os.path.join(LOGS_DIR, when.strftime("%Y-%m-%d"), when.strftime("%H-00.log"))
+
+def format_error_entry(timestamp, command_name, message, stack, fingerprint=None, repeats=0):
+    header = f"\nFINGERPRINT: {fingerprint} ({repeats} repeats since the last trace)" if fingerprint else ""
+    return f"""
+[{timestamp}] COMMAND: {command_name}{header}
+MESSAGE: {message}
+STACK: {stack}
+--------------------------------------------------------------------------------
+"""
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line; command errors carry their command and stack
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("command", "fingerprint", "repeats"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["stack"] = "".join(traceback.format_exception(*record.exc_info))
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+
+class ErrorEntryFormatter(logging.Formatter):
+    # The legacy logs/<date>/<hour>.log layout
+    def format(self, record):
+        stack = "".join(traceback.format_exception(*record.exc_info)) if record.exc_info else ""
+        timestamp = datetime.datetime.fromtimestamp(record.created).isoformat()
+        return format_error_entry(
+            timestamp, getattr(record, "command", "unknown"), record.getMessage(), stack,
+            getattr(record, "fingerprint", None), getattr(record, "repeats", 0)
+        )
+
+class BatchFileHandler(logging.FileHandler):
+    # Writes without flushing per record; the listener flushes once per batch.
+    # The file is rotated into logs/archive/ (and compressed there by the
+    # archiver) once it reaches LOG_MAX_MB or at the first record of a new day.
+    terminator = ""
+
+    def __init__(self, filename, archiver=None, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.archiver = archiver
+        self._day = None
+
+    def should_rollover(self, record):
+        if self._day is not None and datetime.date.fromtimestamp(record.created) != self._day:
+            return True
+        return self.stream.tell() >= Config.LOG_MAX_MB * 1024 * 1024
+
+    def rollover(self):
+        self.stream.close()
+        self.stream = None
+        archive_dir = os.path.join(LOGS_DIR, ARCHIVE_DIR)
+        os.makedirs(archive_dir, exist_ok=True)
+        name, ext = os.path.splitext(os.path.basename(self.baseFilename))
+        stamp = f"{name}-{datetime.datetime.now():%Y-%m-%d-%H%M%S}"
+        target = os.path.join(archive_dir, f"{stamp}{ext}")
+        part = 1
+        while any(os.path.exists(target + suffix) for suffix in ("", ".gz", ".zst")):
+            target = os.path.join(archive_dir, f"{stamp}.{part}{ext}")
+            part += 1
+        os.replace(self.baseFilename, target)
+        if self.archiver:
+            self.archiver.submit(target)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+                if self.stream.tell():
+                    # Left over from an earlier run: rotate it if it is from another day
+                    self._day = datetime.date.fromtimestamp(os.path.getmtime(self.baseFilename))
+            if self.should_rollover(record):
+                self.rollover()
+                self.stream = self._open()
+            self.stream.write(self.format(record) + ("" if isinstance(self.formatter, JsonFormatter) else "\n"))
+            self._day = datetime.date.fromtimestamp(record.created)
+        except Exception:
+            self.handleError(record)
+
+class HourlyErrorHandler(logging.Handler):
+    # Appends command errors to logs/<date>/<hour>.log, keeping the current file
+    # open. A file over LOG_MAX_MB continues in <hour>.1.log, <hour>.2.log...
+    # Closed files go to the archiver and every entry is added to the index.
+    def __init__(self, archiver=None, index=None):
+        super().__init__()
+        self.archiver = archiver
+        self.index = index
+        self._base = None
+        self._path = None
+        self._chunk = 0
+        self._stream = None
+
+    @staticmethod
+    def _chunk_path(base, chunk):
+        return base if chunk == 0 else f"{base[:-4]}.{chunk}.log"
+
+    @staticmethod
+    def _reusable(path):
+        if any(os.path.exists(path + suffix) for suffix in COMPRESSED_SUFFIXES):
+            return False
+        return not os.path.exists(path) or os.path.getsize(path) < Config.LOG_MAX_MB * 1024 * 1024
+
+    def _open(self, base):
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        chunk = 0
+        # Continue in the last chunk, unless it is full or already archived
+        # (a chunk with a compressed copy must never be reopened)
+        while exists(self._chunk_path(base, chunk + 1)) or not self._reusable(self._chunk_path(base, chunk)):
+            chunk += 1
+        self._base = base
+        self._chunk = chunk
+        self._path = self._chunk_path(base, chunk)
+        self._stream = open(self._path, "a", encoding="utf-8")
+
+    def emit(self, record):
+        try:
+            base = error_log_path(datetime.datetime.fromtimestamp(record.created))
+            if base != self._base:
+                self.close_stream(archive=True)
+                self._open(base)
+            elif self._stream.tell() >= Config.LOG_MAX_MB * 1024 * 1024:
+                self.close_stream(archive=True)
+                self._open(base)
+
+            offset = self._stream.tell()
+            self._stream.write(self.format(record))
+            if self.index is not None:
+                self.index.add({
+                    "time": record.created,
+                    "command": getattr(record, "command", None),
+                    "fingerprint": getattr(record, "fingerprint", None),
+                    "type": record.exc_info[0].__name__ if record.exc_info else None,
+                    "message": record.getMessage()[:200],
+                    "file": self._path,
+                    "chunk": self._chunk,
+                    "offset": offset,
+                })
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        if self._stream:
+            self._stream.flush()
+        if self.index is not None:
+            self.index.flush()
+
+    def close_stream(self, archive=False):
+        if self._stream:
+            self._stream.close()
+            if archive and self.archiver:
+                self.archiver.submit(self._path)
+        self._stream = None
+        self._base = None
+        self._path = None
+
+    def close(self):
+        self.close_stream()
+        super().close()
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    # Puts records on a bounded queue without blocking the event loop (records
+    # are logged from it, so waiting for room would stall the bot). When the
+    # queue is full, LOG_OVERFLOW decides: drop_new (default) discards the
+    # record, drop_old discards the oldest queued one.
+    def __init__(self, log_queue, overflow):
+        super().__init__(log_queue)
+        self.overflow = overflow if overflow in ("drop_new", "drop_old") else "drop_new"
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # Only merge the message here; tracebacks are formatted on the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        # Returns whether the record was queued
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if not self._overflow(record):
+                with self._lock:
+                    self.dropped += 1
+                    self._unreported += 1
+                return False
+
+        if self._unreported:
+            with self._lock:
+                count, self._unreported = self._unreported, 0
+            notice = logging.LogRecord("motionbot", logging.WARNING, __file__, 0,
+                                       f"Log queue full: dropped {count} records", None, None)
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                with self._lock:
+                    self._unreported += count
+        return True
+
+    def _overflow(self, record):
+        try:
+            if self.overflow == "drop_old":
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                    with self._lock:
+                        self.dropped += 1
+                        self._unreported += 1
+                except queue.Empty:
+                    pass
+                self.queue.put_nowait(record)
+                return True
+        except queue.Full:
+            pass
+        return False
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    # Drains whatever is queued (up to batch_size) per wakeup and flushes the
+    # file handlers once per batch instead of once per record
+    def __init__(self, log_queue, *handlers, batch_size=500):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.written = 0
+
+    def enqueue_sentinel(self):
+        # Must not be dropped, even when the queue is full
+        self.queue.put(self._sentinel)
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            self.written += len(batch) - stop
+            for _ in batch:
+                q.task_done()
+            if stop:
+                return
+
+def start_logging(logger):
+    # Moves the file logging of `logger` (bot.log) and of command errors behind a
+    # bounded queue written by a background thread
+    global _handler, _listener, _archiver, _index
+    if _listener is not None:
+        return
+
+    # Compression of closed files, retention and the error index
+    _index = LogIndex(LOGS_DIR, Config.LOG_INDEX_SIZE)
+    _index.load()
+    _archiver = LogArchiver(LOGS_DIR, _index)
+    _archiver.start()
+
+    use_json = Config.LOG_FORMAT == "json"
+    bot_log = BatchFileHandler(BOT_LOG_PATH, archiver=_archiver, encoding="utf-8", delay=True)
+    bot_log.setFormatter(JsonFormatter() if use_json else logging.Formatter(TEXT_FORMAT))
+    bot_log.addFilter(lambda record: record.name != error_logger.name)
+
+    errors = HourlyErrorHandler(_archiver, _index)
+    errors.setFormatter(JsonFormatter() if use_json else ErrorEntryFormatter())
+    errors.addFilter(lambda record: record.name == error_logger.name)
+
+    log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    _handler = BoundedQueueHandler(log_queue, Config.LOG_OVERFLOW)
+    _listener = BatchingQueueListener(log_queue, bot_log, errors, batch_size=Config.LOG_BATCH_SIZE)
+    logger.addHandler(_handler)
+    error_logger.addHandler(_handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    # Writes out everything still queued
+    global _handler, _listener, _archiver, _index
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger("motionbot").removeHandler(_handler)
+    error_logger.removeHandler(_handler)
+    _archiver.stop()
+    _index.close()
+    _handler = None
+    _listener = None
+    _archiver = None
+    _index = None
+
+def logging_stats():
+    if _listener is None:
+        return {"running": False}
+    return {
+        "running": True,
+        "format": Config.LOG_FORMAT,
+        "overflow": _handler.overflow,
+        "queued": _handler.queue.qsize(),
+        "queueSize": _handler.queue.maxsize,
+        "written": _listener.written,
+        "dropped": _handler.dropped,
+        "indexedErrors": len(_index),
+        "archive": _archiver.stats(),
+    }
+
+def search_errors(text=None, command=None, fingerprint=None, since=None, limit=50):
+    # Recent command errors from the index, newest first
+    if _index is None:
+        return []
+    return _index.search(text, command, fingerprint, since, limit)
+
+def log_error(error, command_name, fingerprint=None, repeats=0):
+    # Returns the hour's log file, or None when the record had to be dropped
     now = datetime.datetime.now()
-    date_dir = now.strftime("%Y-%m-%d")
-    hour_file = now.strftime("%H-00.log")
-    
-    logs_dir = os.path.join("logs", date_dir)
-    log_file_path = os.path.join(logs_dir, hour_file)
-    
+    log_file_path = error_log_path(now)
+
+    if _listener is not None:
+        # Non-blocking: formatted and written by the logging thread
+        record = error_logger.makeRecord(
+            error_logger.name, logging.ERROR, __file__, 0, str(error), None,
+            (type(error), error, error.__traceback__),
+            extra={"command": command_name, "fingerprint": fingerprint, "repeats": repeats},
+        )
+        return log_file_path if _handler.enqueue(_handler.prepare(record)) else None
+
+    logs_dir = os.path.dirname(log_file_path)
     if not os.path.exists(logs_dir):
         os.makedirs(logs_dir, exist_ok=True)
-        
-    timestamp = now.isoformat()
+
     stack = "".join(traceback.format_exception(type(error), error, error.__traceback__))
-    
-    log_entry = f"""
-[{timestamp}] COMMAND: {command_name}
-MESSAGE: {str(error)}
-STACK: {stack}
---------------------------------------------------------------------------------
-"""
-    
     with open(log_file_path, "a", encoding="utf-8") as f:
-        f.write(log_entry)
-        
+        f.write(format_error_entry(now.isoformat(), command_name, str(error), stack, fingerprint, repeats))
+
     return log_file_path
@@ -0,0 +1,100 @@
+import asyncio
+import random
+import time
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    # Fails fast while an upstream is unhealthy. After `threshold` consecutive
+    # failures the circuit opens for `reset_timeout` seconds; then a single probe
+    # is let through (half-open) and its outcome closes or re-opens the circuit.
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self):
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self):
+        if self.state != self.OPEN:
+            return 0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self):
+        # The call ended without an outcome (e.g. it was cancelled): let another
+        # request probe instead of leaving the circuit half-open forever
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "threshold": self.threshold,
+            "resetTimeout": self.reset_timeout,
+            "retryAfter": round(self.retry_after(), 2),
+            "timesOpened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+def backoff_delay(attempt, base, cap):
+    # Exponential backoff with full jitter: uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+async def hedged(make_call, hedge_after):
+    # Start `make_call()`; if it has not finished after `hedge_after` seconds,
+    # start a second identical call and return whichever succeeds first.
+    # Returns (result, hedged, hedge_won).
+    tasks = [asyncio.create_task(make_call())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return tasks[0].result(), False, False
+
+        tasks.append(asyncio.create_task(make_call()))
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), True, task is tasks[1]
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,38 @@
+import asyncio
+
+class SingleFlight:
+    # Coalesces concurrent calls by key: the first caller starts the work, every
+    # caller that arrives while it is in flight awaits the same result (or error).
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.shared = 0
+
+    def in_flight(self, key=None):
+        return key in self._calls if key is not None else len(self._calls)
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.started += 1
+        else:
+            self.shared += 1
+        # Shielded so one caller giving up does not cancel the call for the rest
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every caller went away
+
+    def stats(self):
+        return {"inFlight": len(self._calls), "started": self.started, "shared": self.shared}
+
+    def cancel_all(self):
+        for task in list(self._calls.values()):
+            task.cancel()
+        self._calls.clear()
@@ -1,69 +1,225 @@
-import json
-import os
+import asyncio
+import copy
+import logging
+import threading
+from utils.storage import get_backend
 
-STORAGE_PATH = 'stickyMessages.json'
-locks = set()
+FLUSH_INTERVAL = 5  # seconds between background flushes of lastMessageId updates
+
+logger = logging.getLogger("motionbot")
 
 class StickyManager:
+    # In-memory store, loaded once from the storage backend:
+    #   _data:     {guild_id: {channel_id: config}}  (string keys, same shape as the file)
+    #   _channels: set of int channel IDs with a sticky, for the on_message pre-check
+    #   _names:    {guild_id: {name: channel_id}} for lookups by sticky name
+    _data = None
+    _channels = set()
+    _names = {}
+    _flush_task = None
+    # Pending changes: {(guild_id, channel_id): version}. Every mutation bumps
+    # _version; a key is only cleared once a write of that version succeeded, and
+    # a background write of an older snapshot never overwrites a newer row or file.
+    _changes = {}
+    _version = 0
+    _written_version = 0
+    _written_rows = {}
+    _write_lock = threading.Lock()
+
     @staticmethod
     def read_data():
-        if not os.path.exists(STORAGE_PATH):
-            return {}
         try:
-            with open(STORAGE_PATH, 'r') as f:
-                return json.load(f)
+            return get_backend().load_stickies() or {}
         except Exception as e:
             print(f"Error reading sticky data: {e}")
             return {}
 
-    @staticmethod
-    def write_data(data):
-        try:
-            with open(STORAGE_PATH, 'w') as f:
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            print(f"Error writing sticky data: {e}")
+    @classmethod
+    def load(cls):
+        cls._data = cls.read_data()
+        cls._changes = {}
+        cls._rebuild_indexes()
+
+    @classmethod
+    def _ensure_loaded(cls):
+        if cls._data is None:
+            cls.load()
+
+    @classmethod
+    def _rebuild_indexes(cls):
+        cls._channels = set()
+        cls._names = {}
+        for g_id, channels in cls._data.items():
+            for c_id, config in channels.items():
+                cls._index(g_id, c_id, config)
+
+    @classmethod
+    def _index(cls, g_id, c_id, config):
+        cls._channels.add(int(c_id))
+        name = config.get('name')
+        if name is not None:
+            cls._names.setdefault(g_id, {})[name] = c_id
+
+    @classmethod
+    def _unindex(cls, g_id, c_id, config):
+        cls._channels.discard(int(c_id))
+        names = cls._names.get(g_id)
+        name = config.get('name')
+        if names and names.get(name) == c_id:
+            del names[name]
+            # Names are not unique per guild: fall back to another channel using it
+            for other_id, other in cls._data.get(g_id, {}).items():
+                if other_id != c_id and other.get('name') == name:
+                    names[name] = other_id
+                    break
+            if not names:
+                del cls._names[g_id]
+
+    @classmethod
+    def _mark(cls, g_id, c_id):
+        cls._version += 1
+        cls._changes[(g_id, c_id)] = cls._version
+
+    @classmethod
+    def has_sticky(cls, channel_id):
+        cls._ensure_loaded()
+        return int(channel_id) in cls._channels
 
     @classmethod
     def get_sticky(cls, guild_id, channel_id):
-        data = cls.read_data()
-        return data.get(str(guild_id), {}).get(str(channel_id))
+        cls._ensure_loaded()
+        return cls._data.get(str(guild_id), {}).get(str(channel_id))
+
+    @classmethod
+    def get_guild_stickies(cls, guild_id):
+        cls._ensure_loaded()
+        return dict(cls._data.get(str(guild_id), {}))
+
+    @classmethod
+    def list_stickies(cls):
+        cls._ensure_loaded()
+        return [
+            (g_id, c_id, config)
+            for g_id, channels in cls._data.items()
+            for c_id, config in channels.items()
+        ]
 
     @classmethod
-    def set_sticky(cls, guild_id, channel_id, config):
-        data = cls.read_data()
+    def find_by_name(cls, guild_id, name):
+        cls._ensure_loaded()
         g_id = str(guild_id)
-        if g_id not in data:
-            data[g_id] = {}
-        data[g_id][str(channel_id)] = config
-        cls.write_data(data)
+        c_id = cls._names.get(g_id, {}).get(name)
+        if c_id is None:
+            return None, None
+        return c_id, cls._data[g_id][c_id]
 
     @classmethod
-    def remove_sticky(cls, guild_id, channel_id):
-        data = cls.read_data()
+    async def set_sticky(cls, guild_id, channel_id, config):
+        cls._ensure_loaded()
         g_id = str(guild_id)
-        if g_id in data and str(channel_id) in data[g_id]:
-            del data[g_id][str(channel_id)]
-            cls.write_data(data)
+        c_id = str(channel_id)
+        guild_data = cls._data.setdefault(g_id, {})
+        if c_id in guild_data:
+            cls._unindex(g_id, c_id, guild_data[c_id])
+        guild_data[c_id] = config
+        cls._index(g_id, c_id, config)
+        cls._mark(g_id, c_id)
+        # Configuration changes are rare and user-initiated: persist them right away
+        await cls._write_changes()
 
     @classmethod
-    def update_last_message_id(cls, guild_id, channel_id, message_id):
-        data = cls.read_data()
+    async def remove_sticky(cls, guild_id, channel_id):
+        cls._ensure_loaded()
         g_id = str(guild_id)
         c_id = str(channel_id)
-        if g_id in data and c_id in data[g_id]:
-            data[g_id][c_id]['lastMessageId'] = message_id
-            cls.write_data(data)
+        if g_id in cls._data and c_id in cls._data[g_id]:
+            cls._unindex(g_id, c_id, cls._data[g_id].pop(c_id))
+            if not cls._data[g_id]:
+                del cls._data[g_id]
+            cls._mark(g_id, c_id)
+            await cls._write_changes()
 
-    @staticmethod
-    def is_locked(channel_id):
-        return channel_id in locks
+    @classmethod
+    def update_last_message_id(cls, guild_id, channel_id, message_id):
+        # Hot path (every repost): update memory only, the flush task persists it
+        config = cls.get_sticky(guild_id, channel_id)
+        if config is not None:
+            config['lastMessageId'] = message_id
+            cls._mark(str(guild_id), str(channel_id))
 
-    @staticmethod
-    def lock(channel_id):
-        locks.add(channel_id)
+    @classmethod
+    def _snapshot(cls):
+        # Taken on the event loop so it is consistent; written elsewhere
+        changes = dict(cls._changes)
+        rows = {}
+        for (g_id, c_id), version in changes.items():
+            config = cls._data.get(g_id, {}).get(c_id)
+            rows[(g_id, c_id)] = (version, dict(config) if config is not None else None)
+        data = copy.deepcopy(cls._data) if get_backend().whole_file else None
+        return cls._version, data, rows, changes
 
-    @staticmethod
-    def unlock(channel_id):
-        if channel_id in locks:
-            locks.remove(channel_id)
+    @classmethod
+    def _persist(cls, version, data, rows):
+        with cls._write_lock:
+            if data is not None and version < cls._written_version:
+                return True
+            rows = {k: v for k, v in rows.items() if v[0] >= cls._written_rows.get(k, 0)}
+            try:
+                get_backend().save_stickies(data, {k: config for k, (_, config) in rows.items()})
+            except Exception as e:
+                print(f"Error writing sticky data: {e}")
+                return False
+            cls._written_version = max(cls._written_version, version)
+            for key, (row_version, _) in rows.items():
+                cls._written_rows[key] = row_version
+            return True
+
+    @classmethod
+    def _clear_written(cls, changes):
+        for key, version in changes.items():
+            if cls._changes.get(key) == version:
+                del cls._changes[key]
+
+    @classmethod
+    async def _write_changes(cls):
+        # Writes off the event loop (the write lock may be held by a flush)
+        if not cls._changes:
+            return True
+        version, data, rows, changes = cls._snapshot()
+        if not await asyncio.to_thread(cls._persist, version, data, rows):
+            return False
+        cls._clear_written(changes)
+        return True
+
+    @classmethod
+    def flush(cls):
+        # Synchronous, for shutdown
+        if cls._data is None or not cls._changes:
+            return
+        version, data, rows, changes = cls._snapshot()
+        if cls._persist(version, data, rows):
+            cls._clear_written(changes)
+
+    @classmethod
+    async def _flush_loop(cls):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            if not await cls._write_changes():
+                logger.error("Failed to flush sticky data, will retry")
+
+    @classmethod
+    def start(cls):
+        cls._ensure_loaded()
+        if cls._flush_task is None:
+            cls._flush_task = asyncio.create_task(cls._flush_loop())
+
+    @classmethod
+    async def stop(cls):
+        if cls._flush_task:
+            cls._flush_task.cancel()
+            try:
+                await cls._flush_task
+            except asyncio.CancelledError:
+                pass
+            cls._flush_task = None
+        cls.flush()
@@ -0,0 +1,30 @@
+import discord
+from utils.theme_manager import ThemeManager
+
+class StickyRenderer:
+    # Rendered sticky embeds, {channel_id: (content, embed)}. A content change is
+    # picked up on lookup; a new theme version clears everything.
+    _cache = {}
+    _theme_version = None
+
+    @classmethod
+    def render(cls, channel_id, content):
+        theme = ThemeManager.get()
+        if theme.version != cls._theme_version:
+            cls._cache.clear()
+            cls._theme_version = theme.version
+
+        cached = cls._cache.get(channel_id)
+        if cached and cached[0] == content:
+            return cached[1]
+
+        embed = discord.Embed(description=content, color=theme.primary)
+        cls._cache[channel_id] = (content, embed)
+        return embed
+
+    @classmethod
+    def invalidate(cls, channel_id=None):
+        if channel_id is None:
+            cls._cache.clear()
+        else:
+            cls._cache.pop(channel_id, None)
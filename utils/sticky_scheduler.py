@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("motionbot")
+
+class StickyScheduler:
+    # Coalesces sticky reposts per channel. Every message marks its channel dirty;
+    # the repost runs once the channel has been quiet for `quiet_window` seconds,
+    # or at the latest `max_delay` seconds after the first pending message.
+    # Messages that arrive while a repost is running mark the channel again, so a
+    # burst always ends with one final repost.
+    def __init__(self, repost, quiet_window, max_delay):
+        self.repost = repost
+        self.quiet_window = quiet_window
+        self.max_delay = max(max_delay, quiet_window)
+        self._pending = {}  # channel_id -> [channel, first_mark, last_mark]
+        self._tasks = {}    # channel_id -> worker task
+
+    def mark(self, channel):
+        now = time.monotonic()
+        state = self._pending.get(channel.id)
+        if state:
+            state[0] = channel
+            state[2] = now
+        else:
+            self._pending[channel.id] = [channel, now, now]
+
+        if channel.id not in self._tasks:
+            self._tasks[channel.id] = asyncio.create_task(self._run(channel.id))
+
+    def cancel(self, channel_id):
+        self._pending.pop(channel_id, None)
+        task = self._tasks.pop(channel_id, None)
+        if task:
+            task.cancel()
+
+    def cancel_all(self):
+        for channel_id in list(self._tasks):
+            self.cancel(channel_id)
+
+    def is_scheduled(self, channel_id):
+        return channel_id in self._tasks
+
+    def pending_count(self):
+        return len(self._pending)
+
+    async def _run(self, channel_id):
+        try:
+            while channel_id in self._pending:
+                channel, first_mark, last_mark = self._pending[channel_id]
+                deadline = min(last_mark + self.quiet_window, first_mark + self.max_delay)
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                del self._pending[channel_id]
+                try:
+                    await self.repost(channel)
+                except Exception as e:
+                    logger.error(f"Error reposting sticky in channel {channel_id}: {e}")
+        finally:
+            if self._tasks.get(channel_id) is asyncio.current_task():
+                del self._tasks[channel_id]
@@ -0,0 +1,356 @@
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from utils.config import Config
+
+STICKY_PATH = 'stickyMessages.json'
+COMMANDS_PATH = 'commands_config.json'
+THEME_PATH = 'theme.json'
+LANGUAGE_SETTINGS_PATH = 'settings/language.json'
+
+logger = logging.getLogger("motionbot")
+
+def read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# Read once at import: os.umask() is process-wide, and writes run in worker threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def atomic_write_json(path, data):
+    # Write to a temp file in the same directory and rename over the original,
+    # so a crash mid-write never leaves a truncated file behind.
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600 files: keep the permissions of the file we replace
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class JsonBackend:
+    # The original flat-file layout. Every save rewrites the whole file, so
+    # callers hand over the complete state alongside the individual changes.
+    name = 'json'
+    whole_file = True
+
+    def load_stickies(self):
+        return read_json(STICKY_PATH, {})
+
+    def save_stickies(self, data, rows):
+        atomic_write_json(STICKY_PATH, data)
+
+    def load_command_config(self):
+        config = read_json(COMMANDS_PATH, None) or {}
+        config.setdefault("global", {})
+        config.setdefault("guilds", {})
+        return config
+
+    def save_command_config(self, config, changes):
+        atomic_write_json(COMMANDS_PATH, config)
+
+    def command_config_version(self):
+        # Changes whenever the file is rewritten, by us or by hand
+        try:
+            return os.stat(COMMANDS_PATH).st_mtime_ns
+        except OSError:
+            return None
+
+    def load_theme(self):
+        return read_json(THEME_PATH, None)
+
+    def save_theme(self, theme):
+        atomic_write_json(THEME_PATH, theme)
+
+    def load_language(self):
+        data = read_json(LANGUAGE_SETTINGS_PATH, None) or {}
+        return data.get('language')
+
+    def save_language(self, lang_code):
+        data = read_json(LANGUAGE_SETTINGS_PATH, None) or {}
+        data['language'] = lang_code
+        atomic_write_json(LANGUAGE_SETTINGS_PATH, data)
+
+    def load_guild_languages(self):
+        data = read_json(LANGUAGE_SETTINGS_PATH, None) or {}
+        return dict(data.get('guilds', {}))
+
+    def save_guild_language(self, guild_id, lang_code):
+        # lang_code None clears the guild's override
+        data = read_json(LANGUAGE_SETTINGS_PATH, None) or {}
+        guilds = data.setdefault('guilds', {})
+        if lang_code:
+            guilds[str(guild_id)] = lang_code
+        else:
+            guilds.pop(str(guild_id), None)
+        atomic_write_json(LANGUAGE_SETTINGS_PATH, data)
+
+    def close(self):
+        pass
+
+# Command toggles use '' as the guild_id of the global scope
+GLOBAL_SCOPE = ''
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stickies (
+    guild_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    name TEXT,
+    content TEXT NOT NULL,
+    last_message_id TEXT,
+    PRIMARY KEY (guild_id, channel_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_stickies_guild_name ON stickies (guild_id, name);
+
+CREATE TABLE IF NOT EXISTS command_toggles (
+    guild_id TEXT NOT NULL,
+    command TEXT NOT NULL,
+    enabled INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, command)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS guild_languages (
+    guild_id TEXT PRIMARY KEY,
+    language TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Statements are kept as constants so sqlite3's per-connection statement cache
+# reuses the compiled (prepared) form on every call.
+SQL_SELECT_STICKIES = "SELECT guild_id, channel_id, name, content, last_message_id FROM stickies"
+SQL_UPSERT_STICKY = (
+    "INSERT INTO stickies (guild_id, channel_id, name, content, last_message_id) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (guild_id, channel_id) DO UPDATE SET "
+    "name = excluded.name, content = excluded.content, last_message_id = excluded.last_message_id"
+)
+SQL_DELETE_STICKY = "DELETE FROM stickies WHERE guild_id = ? AND channel_id = ?"
+SQL_SELECT_TOGGLES = "SELECT guild_id, command, enabled FROM command_toggles"
+SQL_UPSERT_TOGGLE = (
+    "INSERT INTO command_toggles (guild_id, command, enabled) VALUES (?, ?, ?) "
+    "ON CONFLICT (guild_id, command) DO UPDATE SET enabled = excluded.enabled"
+)
+SQL_DELETE_TOGGLE = "DELETE FROM command_toggles WHERE guild_id = ? AND command = ?"
+SQL_SELECT_GUILD_LANGUAGES = "SELECT guild_id, language FROM guild_languages"
+SQL_UPSERT_GUILD_LANGUAGE = (
+    "INSERT INTO guild_languages (guild_id, language) VALUES (?, ?) "
+    "ON CONFLICT (guild_id) DO UPDATE SET language = excluded.language"
+)
+SQL_DELETE_GUILD_LANGUAGE = "DELETE FROM guild_languages WHERE guild_id = ?"
+SQL_GET_SETTING = "SELECT value FROM settings WHERE key = ?"
+SQL_SET_SETTING = (
+    "INSERT INTO settings (key, value) VALUES (?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+)
+
+class SQLiteBackend:
+    # Indexed tables in a single WAL-mode database. Writers only touch the rows
+    # that changed, and several bot processes can share the same file.
+    name = 'sqlite'
+    whole_file = False
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.executescript(SCHEMA)
+        self._migrate_from_json()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            else:
+                cur.execute("COMMIT")
+
+    def _get_setting(self, key):
+        with self._lock:
+            row = self._conn.execute(SQL_GET_SETTING, (key,)).fetchone()
+        return row[0] if row else None
+
+    def _migrate_from_json(self):
+        # One-time import of the flat JSON files. Runs inside a write transaction
+        # so concurrent processes starting together only migrate once.
+        with self._transaction() as cur:
+            if cur.execute(SQL_GET_SETTING, ('json_migrated',)).fetchone():
+                return
+
+            source = JsonBackend()
+            counts = {"stickies": 0, "toggles": 0}
+
+            def import_stickies():
+                for g_id, channels in (source.load_stickies() or {}).items():
+                    for c_id, config in channels.items():
+                        cur.execute(SQL_UPSERT_STICKY, self._sticky_row(g_id, c_id, config))
+                        counts["stickies"] += 1
+
+            def import_toggles():
+                commands = source.load_command_config()
+                for name, enabled in commands["global"].items():
+                    cur.execute(SQL_UPSERT_TOGGLE, (GLOBAL_SCOPE, name, int(bool(enabled))))
+                    counts["toggles"] += 1
+                for g_id, toggles in commands["guilds"].items():
+                    for name, enabled in toggles.items():
+                        cur.execute(SQL_UPSERT_TOGGLE, (str(g_id), name, int(bool(enabled))))
+                        counts["toggles"] += 1
+
+            def import_settings():
+                theme = source.load_theme()
+                if theme:
+                    cur.execute(SQL_SET_SETTING, ('theme', json.dumps(theme)))
+                language = source.load_language()
+                if language:
+                    cur.execute(SQL_SET_SETTING, ('language', language))
+                for g_id, lang_code in source.load_guild_languages().items():
+                    cur.execute(SQL_UPSERT_GUILD_LANGUAGE, (str(g_id), lang_code))
+
+            # Each table imports on its own. A broken JSON file should not block
+            # startup, but the migration stays pending (and is retried on the next
+            # start) until every table made it in; the upserts make retries safe.
+            failed = []
+            for table, run in (("stickies", import_stickies), ("command toggles", import_toggles), ("settings", import_settings)):
+                try:
+                    run()
+                except Exception as e:
+                    failed.append(table)
+                    logger.error(f"Storage migration of {table} from JSON failed, will retry on next start: {e}")
+
+            if not failed:
+                cur.execute(SQL_SET_SETTING, ('json_migrated', '1'))
+            logger.info(f"Migrated JSON state into {self.path}: {counts['stickies']} stickies, {counts['toggles']} command toggles")
+
+    @staticmethod
+    def _sticky_row(g_id, c_id, config):
+        last_id = config.get('lastMessageId')
+        return (
+            str(g_id), str(c_id), config.get('name'), config.get('content', ''),
+            str(last_id) if last_id is not None else None
+        )
+
+    def load_stickies(self):
+        data = {}
+        with self._lock:
+            rows = self._conn.execute(SQL_SELECT_STICKIES).fetchall()
+        for g_id, c_id, name, content, last_id in rows:
+            config = {"name": name, "content": content}
+            if last_id is not None:
+                config["lastMessageId"] = last_id
+            data.setdefault(g_id, {})[c_id] = config
+        return data
+
+    def save_stickies(self, data, rows):
+        # rows: {(guild_id, channel_id): config or None when removed}
+        with self._transaction() as cur:
+            for (g_id, c_id), config in rows.items():
+                if config is None:
+                    cur.execute(SQL_DELETE_STICKY, (str(g_id), str(c_id)))
+                else:
+                    cur.execute(SQL_UPSERT_STICKY, self._sticky_row(g_id, c_id, config))
+
+    def load_command_config(self):
+        config = {"global": {}, "guilds": {}}
+        with self._lock:
+            rows = self._conn.execute(SQL_SELECT_TOGGLES).fetchall()
+        for g_id, name, enabled in rows:
+            if g_id == GLOBAL_SCOPE:
+                config["global"][name] = bool(enabled)
+            else:
+                config["guilds"].setdefault(g_id, {})[name] = bool(enabled)
+        return config
+
+    def save_command_config(self, config, changes):
+        # changes: [(guild_id or None, command_name, enabled or None to clear)]
+        with self._transaction() as cur:
+            for guild_id, name, enabled in changes:
+                scope = str(guild_id) if guild_id else GLOBAL_SCOPE
+                if enabled is None:
+                    cur.execute(SQL_DELETE_TOGGLE, (scope, name))
+                else:
+                    cur.execute(SQL_UPSERT_TOGGLE, (scope, name, int(bool(enabled))))
+
+    def command_config_version(self):
+        # data_version changes when another connection (process) commits
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load_theme(self):
+        value = self._get_setting('theme')
+        return json.loads(value) if value else None
+
+    def save_theme(self, theme):
+        with self._transaction() as cur:
+            cur.execute(SQL_SET_SETTING, ('theme', json.dumps(theme)))
+
+    def load_language(self):
+        return self._get_setting('language')
+
+    def save_language(self, lang_code):
+        with self._transaction() as cur:
+            cur.execute(SQL_SET_SETTING, ('language', lang_code))
+
+    def load_guild_languages(self):
+        with self._lock:
+            return dict(self._conn.execute(SQL_SELECT_GUILD_LANGUAGES).fetchall())
+
+    def save_guild_language(self, guild_id, lang_code):
+        with self._transaction() as cur:
+            if lang_code:
+                cur.execute(SQL_UPSERT_GUILD_LANGUAGE, (str(guild_id), lang_code))
+            else:
+                cur.execute(SQL_DELETE_GUILD_LANGUAGE, (str(guild_id),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_backend = None
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        name = Config.STORAGE_BACKEND
+        if name == 'sqlite':
+            _backend = SQLiteBackend(Config.SQLITE_PATH)
+        else:
+            if name != 'json':
+                logger.warning(f"Unknown STORAGE_BACKEND '{name}', falling back to json")
+            _backend = JsonBackend()
+    return _backend
+
+def close_backend():
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
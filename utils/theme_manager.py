@@ -1,32 +1,101 @@
-import json
-import os
+import asyncio
+import discord
+from utils.storage import get_backend
 
-THEME_FILE = 'theme.json'
+DEFAULT_THEME = {"primary": "#5865F2", "accent": "#EB459E", "error": "#ED4245"}
+REQUIRED_KEYS = ('primary', 'accent', 'error')
+
+def parse_colour(value):
+    return discord.Colour(int(str(value).replace('#', ''), 16))
+
+class Theme:
+    # Snapshot of the theme with every colour parsed once. A new object (with a
+    # higher version) replaces it on each change, so holders can compare versions.
+    __slots__ = ('raw', 'version', 'primary', 'accent', 'error')
+
+    def __init__(self, raw, version):
+        self.raw = raw
+        self.version = version
+        for key in REQUIRED_KEYS:
+            try:
+                colour = parse_colour(raw.get(key, DEFAULT_THEME[key]))
+            except (TypeError, ValueError):
+                colour = parse_colour(DEFAULT_THEME[key])
+            setattr(self, key, colour)
 
 class ThemeManager:
+    _theme = None
+    _version = 0
+    # Callbacks run with the new Theme after every change
+    _subscribers = []
+
+    @classmethod
+    def subscribe(cls, callback):
+        if callback not in cls._subscribers:
+            cls._subscribers.append(callback)
+
+    @classmethod
+    def unsubscribe(cls, callback):
+        if callback in cls._subscribers:
+            cls._subscribers.remove(callback)
+
     @staticmethod
-    def get_theme():
-        if not os.path.exists(THEME_FILE):
-            return {"primary": "#5865F2", "accent": "#EB459E", "error": "#ED4245"}
-        
+    def load_theme():
         try:
-            with open(THEME_FILE, 'r') as f:
-                return json.load(f)
+            return get_backend().load_theme() or dict(DEFAULT_THEME)
         except Exception as e:
             print(f"Error reading theme: {e}")
-            return {"primary": "#5865F2", "accent": "#EB459E", "error": "#ED4245"}
+            return dict(DEFAULT_THEME)
 
-    @staticmethod
-    def set_theme(theme_data):
-        # Validate keys
-        required = ['primary', 'accent', 'error']
-        if not all(k in theme_data for k in required):
+    @classmethod
+    def _replace(cls, raw):
+        cls._version += 1
+        cls._theme = Theme(raw, cls._version)
+        for callback in list(cls._subscribers):
+            try:
+                callback(cls._theme)
+            except Exception as e:
+                print(f"Error in theme subscriber: {e}")
+
+    @classmethod
+    def get(cls):
+        if cls._theme is None:
+            cls._version += 1
+            cls._theme = Theme(cls.load_theme(), cls._version)
+        return cls._theme
+
+    @classmethod
+    def get_theme(cls):
+        return dict(cls.get().raw)
+
+    @classmethod
+    async def reload(cls, force=False):
+        # Only subscribers of an actual change are notified (re-rendering is not free)
+        # A failed read keeps the current theme and raises, so FileWatcher reports it
+        raw = await asyncio.to_thread(get_backend().load_theme) or dict(DEFAULT_THEME)
+        if not isinstance(raw, dict):
+            raise ValueError("theme must be a JSON object")
+        if raw == cls.get().raw:
+            return False
+        cls._replace(raw)
+        return True
+
+    @classmethod
+    def set_theme(cls, theme_data):
+        # Validate keys and colours
+        if not isinstance(theme_data, dict) or not all(k in theme_data for k in REQUIRED_KEYS):
+            return False
+        try:
+            for key in REQUIRED_KEYS:
+                parse_colour(theme_data[key])
+        except (TypeError, ValueError):
             return False
             
         try:
-            with open(THEME_FILE, 'w') as f:
-                json.dump(theme_data, f, indent=4)
-            return True
+            get_backend().save_theme(theme_data)
         except Exception as e:
             print(f"Error saving theme: {e}")
             return False
+
+        cls._replace(dict(theme_data))
+        return True
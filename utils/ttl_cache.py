@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+class TTLCache:
+    # Size-bounded LRU whose entries are fresh for `ttl` seconds and can then be
+    # served stale for another `stale_ttl` seconds (while the caller refreshes
+    # them) before they count as a miss.
+    def __init__(self, maxsize, ttl, stale_ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        # Returns (value, FRESH | STALE), or (None, None) on a miss
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age <= self.ttl:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, FRESH
+        if age <= self.ttl + self.stale_ttl:
+            self._data.move_to_end(key)
+            self.stale_hits += 1
+            return value, STALE
+
+        del self._data[key]
+        self.misses += 1
+        return None, None
+
+    def set(self, key, value, age=0):
+        # `age`: seconds since the value was fetched, for values restored from disk
+        self._data[key] = (value, time.monotonic() - age)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxSize": self.maxsize,
+            "ttl": self.ttl,
+            "staleTtl": self.stale_ttl,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
@@ -1,11 +1,11 @@
 import asyncio
 import os
-import aiohttp
 from quart import Quart, jsonify, request, send_from_directory, Response
 from utils.config import Config
 from utils.theme_manager import ThemeManager
 from utils.language_manager import LanguageManager
 from utils.command_manager import CommandManager
+from utils.file_watcher import FileWatcher
 import time
 
 WEB_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -47,11 +47,10 @@ async def api_avatar():
 async def api_developer():
     # Cache logic could be added here, simplified for now
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get('https://github.com/adrielGGmotion.png') as resp:
-                if resp.status == 200:
-                    data = await resp.read()
-                    return Response(data, mimetype='image/png')
+        async with bot_instance.http_client.get('https://github.com/adrielGGmotion.png') as resp:
+            if resp.status == 200:
+                data = await resp.read()
+                return Response(data, mimetype='image/png')
     except:
         pass
     return "Error", 500
@@ -119,20 +118,150 @@ async def api_commands_toggle():
     
     return jsonify({"success": True})
 
+def is_guild_id(value):
+    # Snowflakes arrive as strings (or ints); bool is an int, but not an id
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+@app.route('/api/commands/toggle/batch', methods=['POST'])
+async def api_commands_toggle_batch():
+    # Expects { changes: [{ name, enabled, guildId }] } and applies them in one write
+    data = await request.get_json(silent=True) or {}
+    raw_changes = data.get('changes', []) if isinstance(data, dict) else None
+    if not isinstance(raw_changes, list) or not all(isinstance(change, dict) for change in raw_changes):
+        return jsonify({"success": False, "error": "changes must be a list of objects"}), 400
+    changes = []
+    for change in raw_changes:
+        name = change.get('name')
+        enabled = change.get('enabled')
+        guild_id = change.get('guildId')
+        if not name or not isinstance(name, str) or not isinstance(enabled, bool):
+            return jsonify({"success": False, "error": "Each change needs a name and a boolean enabled"}), 400
+        if guild_id is not None and not is_guild_id(guild_id):
+            return jsonify({"success": False, "error": "guildId must be a string, a number or null"}), 400
+        changes.append((guild_id, name, enabled))
+
+    if changes:
+        CommandManager.set_command_statuses(changes)
+    return jsonify({"success": True, "applied": len(changes)})
+
+@app.route('/api/commands/copy', methods=['POST'])
+async def api_commands_copy():
+    # Expects { sourceGuildId, targetGuildIds: [...] }
+    data = await request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Expected a JSON object"}), 400
+    source = data.get('sourceGuildId')
+    targets = data.get('targetGuildIds') or []
+    if not source or not is_guild_id(source) or not isinstance(targets, list):
+        return jsonify({"success": False, "error": "sourceGuildId and targetGuildIds are required"}), 400
+    if not all(is_guild_id(target) for target in targets):
+        return jsonify({"success": False, "error": "targetGuildIds must only contain guild ids"}), 400
+
+    applied = CommandManager.copy_guild_policy(source, targets)
+    return jsonify({"success": True, "applied": applied})
+
 @app.route('/api/language', methods=['GET', 'POST'])
 async def api_language():
     if request.method == 'POST':
         data = await request.get_json()
         lang = data.get('language')
-        if LanguageManager.set_language(lang):
+        guild_id = data.get('guildId')
+        # With a guildId, sets (or clears, for an empty language) that guild's override
+        ok = LanguageManager.set_guild_language(guild_id, lang) if guild_id else LanguageManager.set_language(lang)
+        if ok:
              return jsonify({"success": True})
         return jsonify({"success": False}), 500
 
     return jsonify({
-        "current": LanguageManager.get_language(),
+        "current": LanguageManager.get_language(request.args.get('guildId')),
         "available": LanguageManager.get_available_languages()
     })
 
+@app.route('/api/language/validate')
+async def api_language_validate():
+    return jsonify(LanguageManager.validate())
+
+@app.route('/api/reload', methods=['GET', 'POST'])
+async def api_reload():
+    # POST { targets?: ['language', 'theme', 'commands'] } reloads without a restart
+    if request.method == 'POST':
+        data = await request.get_json(silent=True) or {}
+        targets = data.get('targets')
+        if targets is not None:
+            known = FileWatcher.status()["targets"]
+            if not isinstance(targets, list) or not all(isinstance(t, str) and t in known for t in targets):
+                return jsonify({"success": False, "error": f"targets must be a list of: {', '.join(known)}"}), 400
+        results = await FileWatcher.reload(targets)
+        return jsonify({"success": True, "targets": results})
+
+    return jsonify(FileWatcher.status())
+
+@app.route('/api/gsm/cache')
+async def api_gsm_cache():
+    if not bot_instance:
+        return jsonify({"error": "Bot not initialized"}), 500
+    return jsonify(bot_instance.gsm_client.stats())
+
+@app.route('/api/gsm/status')
+async def api_gsm_status():
+    if not bot_instance:
+        return jsonify({"error": "Bot not initialized"}), 500
+    return jsonify(bot_instance.gsm_client.upstream_status())
+
+@app.route('/api/gsm/health')
+async def api_gsm_health():
+    from utils.keep_alive_manager import KeepAliveManager
+    return jsonify(KeepAliveManager.health())
+
+@app.route('/api/errors')
+async def api_errors():
+    # ?limit=20&sort=count|recent
+    from utils.error_tracker import ErrorTracker
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        **ErrorTracker.stats(),
+        "errors": ErrorTracker.top(limit, request.args.get('sort', 'count'))
+    })
+
+@app.route('/api/errors/<fingerprint>')
+async def api_error_detail(fingerprint):
+    from utils.error_tracker import ErrorTracker
+    entry = ErrorTracker.get(fingerprint)
+    if entry is None:
+        return jsonify({"error": "Unknown fingerprint"}), 404
+    return jsonify(entry)
+
+@app.route('/api/logs/status')
+async def api_logs_status():
+    from utils.logger import logging_stats
+    return jsonify(logging_stats())
+
+@app.route('/api/logs/search')
+async def api_logs_search():
+    # ?q=&command=&fingerprint=&since=<unix time>&limit=50, newest first
+    from utils.logger import search_errors
+    return jsonify(search_errors(
+        request.args.get('q'),
+        request.args.get('command'),
+        request.args.get('fingerprint'),
+        request.args.get('since', type=float),
+        request.args.get('limit', 50, type=int)
+    ))
+
+@app.route('/api/logs/entry')
+async def api_logs_entry():
+    # ?file=<indexed file>&offset=<indexed offset>
+    from utils.logger import LOGS_DIR
+    from utils.log_archive import read_entry
+    file = os.path.normpath(request.args.get('file', ''))
+    offset = request.args.get('offset', 0, type=int)
+    if not file.startswith(LOGS_DIR + os.sep) or '..' in file.split(os.sep):
+        return jsonify({"error": "Invalid file"}), 400
+    entry = await asyncio.to_thread(read_entry, file, offset)
+    if entry is None:
+        return jsonify({"error": "Log file not found"}), 404
+    return jsonify({"file": file, "offset": offset, "entry": entry})
+
 @app.route('/api/config/gsm')
 async def api_config_gsm():
     return jsonify({